@@ -0,0 +1,55 @@
+"""
+Benchmark CSV formatting of large exports.
+
+Usage:
+
+    python benchmarks/bench_csv.py [--rows 10000 100000 1000000] [--repeat 3]
+
+"""
+from argparse import ArgumentParser
+from timeit import repeat
+
+from microcosm_flask.formatting import CSVFormatter
+
+
+class ExportSchema:
+    csv_column_order = ["id", "name"]
+
+
+def make_items(rows, nested):
+    return [
+        dict(
+            id=index,
+            name="name-{}".format(index),
+            email="user-{}@example.com".format(index),
+            address=dict(city="San Francisco", zip="94110") if nested else "San Francisco",
+        )
+        for index in range(rows)
+    ]
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    formatter = CSVFormatter(ExportSchema())
+
+    for rows in args.rows:
+        for nested in (False, True):
+            response_data = dict(items=make_items(rows, nested))
+            best = min(repeat(
+                lambda: "".join(formatter.format(response_data)),
+                number=1,
+                repeat=args.repeat,
+            ))
+            label = "nested" if nested else "flat"
+            print("{:>8} rows {:>6}: {:8.3f} s ({:10.0f} rows/s)".format(rows, label, best, rows / best))  # noqa
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark endpoint parsing over a large url map.
+
+Usage:
+
+    python benchmarks/bench_endpoints.py [--routes 1000] [--repeat 5]
+
+"""
+from argparse import ArgumentParser
+from timeit import repeat
+
+from microcosm.api import create_object_graph
+
+from microcosm_flask.conventions.registry import iter_endpoints
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+OPERATIONS = [
+    ("collection_path", Operation.Search),
+    ("collection_path", Operation.Create),
+    ("instance_path", Operation.Retrieve),
+    ("instance_path", Operation.Delete),
+]
+
+
+def make_graph(routes):
+    graph = create_object_graph(name="example", testing=True)
+
+    for index in range(routes // len(OPERATIONS)):
+        ns = Namespace(subject="foo{}".format(index))
+        for path, operation in OPERATIONS:
+            graph.route(getattr(ns, path), operation, ns)(lambda **kwargs: None)
+
+    return graph
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--routes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    graph = make_graph(args.routes)
+    endpoints = [rule.endpoint for rule in graph.flask.url_map.iter_rules()]
+
+    def parse():
+        for endpoint in endpoints:
+            try:
+                Namespace.parse_endpoint(endpoint)
+            except Exception:
+                pass
+
+    def iterate():
+        for _ in iter_endpoints(graph, lambda operation, ns, rule: True):
+            pass
+
+    for name, func in (("parse_endpoint", parse), ("iter_endpoints", iterate)):
+        best = min(repeat(func, number=10, repeat=args.repeat)) / 10
+        print("{}: {} rules in {:.3f} ms".format(name, len(endpoints), best * 1000))  # noqa
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark error handling throughput.
+
+Usage:
+
+    python benchmarks/bench_errors.py [--number 10000] [--repeat 5]
+
+"""
+from argparse import ArgumentParser
+from timeit import repeat
+
+from microcosm.api import create_object_graph
+from werkzeug.exceptions import NotFound, Unauthorized
+
+from microcosm_flask.errors import make_json_error
+
+
+class ConflictError(Exception):
+    code = 409
+    context = dict(errors=[dict(message="Banana!")])
+
+
+ERRORS = [
+    ("not_found", NotFound()),
+    ("unauthorized", Unauthorized()),
+    ("with_context", ConflictError()),
+]
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--number", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    graph = create_object_graph(name="example", testing=True)
+
+    with graph.app.test_request_context():
+        for name, error in ERRORS:
+            best = min(repeat(lambda: make_json_error(error), number=args.number, repeat=args.repeat))
+            print("{:>14}: {:10.0f} errors/s".format(name, args.number / best))  # noqa
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark ETag hash functions over a range of payload sizes.
+
+Usage:
+
+    python benchmarks/bench_etags.py [--repeat 5]
+
+"""
+from argparse import ArgumentParser
+from os import urandom
+from timeit import repeat
+
+from microcosm_flask.formatting.hashing import ETAG_HASHES
+
+
+PAYLOAD_SIZES = [
+    ("1KB", 1024),
+    ("100KB", 100 * 1024),
+    ("10MB", 10 * 1024 * 1024),
+]
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    for label, size in PAYLOAD_SIZES:
+        data = memoryview(urandom(size))
+        number = max(1, (10 * 1024 * 1024) // size)
+        for name, hash_func in sorted(ETAG_HASHES.items()):
+            best = min(repeat(lambda: hash_func(data), number=number, repeat=args.repeat)) / number
+            throughput = size / best / (1024 * 1024)
+            print("{:>6} {:>8}: {:10.3f} us ({:8.1f} MB/s)".format(label, name, best * 1e6, throughput))  # noqa
+
+
+if __name__ == "__main__":
+    main()
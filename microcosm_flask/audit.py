@@ -2,12 +2,16 @@
 Audit log support for Flask routes.
 
 """
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from contextlib import contextmanager
 from distutils.util import strtobool
+from enum import Enum, unique
 from functools import wraps
-from logging import DEBUG, getLogger
+from hashlib import md5
+from logging import DEBUG, INFO, WARNING, getLogger
 from json import loads
+from random import random
+from threading import Lock
 from traceback import format_exc
 from uuid import UUID
 
@@ -21,6 +25,7 @@ from microcosm_flask.errors import (
     extract_status_code,
 )
 from microcosm_logging.timing import elapsed_time
+from werkzeug.wrappers import BaseResponse
 
 
 DEFAULT_INCLUDE_REQUEST_BODY = 400
@@ -32,12 +37,85 @@ AuditOptions = namedtuple("AuditOptions", [
     "include_response_body",
     "include_path",
     "include_query_string",
+    "stack_traces",
 ])
+# stack traces are always captured unless configured otherwise
+AuditOptions.__new__.__defaults__ = (None,)
 
 
 SKIP_LOGGING = "_microcosm_flask_skip_audit_logging"
 
 
+@unique
+class StackTracePolicy(Enum):
+    # capture stack traces for all failed requests
+    ALWAYS = "always"
+    # capture stack traces for server (5xx) errors only
+    SERVER_ERRORS = "server_errors"
+    # capture stack traces for a random sample of failed requests
+    SAMPLED = "sampled"
+    # capture the first stack trace per exception type and location; afterwards log a count
+    FINGERPRINT = "fingerprint"
+
+
+class StackTraces:
+    """
+    Decides whether (and how) to capture the stack traces of failed requests.
+
+    Formatting a traceback is comparatively expensive, which matters during error storms.
+
+    """
+    def __init__(self, policy=StackTracePolicy.ALWAYS, sample_rate=1.0, max_fingerprints=1024):
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.max_fingerprints = max_fingerprints
+        self.counts = OrderedDict()
+        self.lock = Lock()
+
+    def capture(self, error, status_code):
+        """
+        Capture a stack trace for the error currently being handled.
+
+        Returns a (stack_trace, fingerprint, count) tuple; the fingerprint and count are
+        only set for the fingerprint policy.
+
+        """
+        if self.policy == StackTracePolicy.SERVER_ERRORS and status_code < 500:
+            return None, None, None
+        if self.policy == StackTracePolicy.SAMPLED and random() >= self.sample_rate:
+            return None, None, None
+        if self.policy != StackTracePolicy.FINGERPRINT:
+            return format_exc(limit=10), None, None
+
+        fingerprint = fingerprint_error(error)
+        with self.lock:
+            count = self.counts.pop(fingerprint, 0) + 1
+            self.counts[fingerprint] = count
+            while len(self.counts) > self.max_fingerprints:
+                self.counts.popitem(last=False)
+
+        stack_trace = format_exc(limit=10) if count == 1 else None
+        return stack_trace, fingerprint, count
+
+
+def fingerprint_error(error):
+    """
+    Compute a short fingerprint of an exception's type and the location that raised it.
+
+    """
+    traceback = error.__traceback__
+    while traceback is not None and traceback.tb_next is not None:
+        traceback = traceback.tb_next
+
+    if traceback is None:
+        location = ""
+    else:
+        location = "{}:{}".format(traceback.tb_frame.f_code.co_filename, traceback.tb_lineno)
+
+    key = "{}.{}|{}".format(error.__class__.__module__, error.__class__.__qualname__, location)
+    return md5(key.encode("utf-8")).hexdigest()[:12]
+
+
 def is_uuid(value):
     try:
         UUID(value)
@@ -122,6 +200,8 @@ class RequestInfo:
 
         self.error = None
         self.stack_trace = None
+        self.stack_trace_fingerprint = None
+        self.stack_trace_count = None
         self.request_body = None
         self.response_body = None
         self.response_headers = None
@@ -163,6 +243,11 @@ class RequestInfo:
                 stack_trace=self.stack_trace,
                 status_code=self.status_code,
             )
+            if self.stack_trace_fingerprint is not None:
+                dct.update(
+                    stack_trace_fingerprint=self.stack_trace_fingerprint,
+                    stack_trace_count=self.stack_trace_count,
+                )
 
         self.post_process_request_body(dct)
         self.post_process_response_body(dct)
@@ -171,6 +256,10 @@ class RequestInfo:
         return dct
 
     def log(self, logger):
+        if not logger.isEnabledFor(WARNING if self.status_code == 500 else INFO):
+            # skip building the log entry
+            return
+
         if self.status_code == 500:
             # something actually went wrong; investigate
             dct = self.to_dict()
@@ -193,12 +282,11 @@ class RequestInfo:
             # only capture request body if requested
             return
 
-        if (
-                request.content_length and
-                self.options.include_request_body is not True and
+        if self.options.include_request_body is not True and (
+                request.content_length is None or
                 request.content_length >= self.options.include_request_body
         ):
-            # don't capture request body if it's too large
+            # don't capture request body if it's too large (or of unknown length)
             return
 
         if not request.get_json(force=True, silent=True):
@@ -241,8 +329,15 @@ class RequestInfo:
         self.error = error
         self.status_code = extract_status_code(error)
         self.success = 0 < self.status_code < 400
-        include_stack_trace = extract_include_stack_trace(error)
-        self.stack_trace = format_exc(limit=10) if (not self.success and include_stack_trace) else None
+        if self.success or not extract_include_stack_trace(error):
+            return
+
+        if self.options.stack_traces is None:
+            self.stack_trace = format_exc(limit=10)
+        else:
+            self.stack_trace, self.stack_trace_fingerprint, self.stack_trace_count = (
+                self.options.stack_traces.capture(error, self.status_code)
+            )
 
     def post_process_request_body(self, dct):
         if g.get("hide_body") or not self.request_body:
@@ -346,6 +441,9 @@ def parse_response(response):
         elif len(response) > 1:
             return response[0], response[1], {}
     try:
+        if isinstance(response, BaseResponse) and response.is_streamed:
+            # do not consume (and buffer) streamed bodies
+            return None, response.status_code, response.headers
         return response.data, response.status_code, response.headers
     except AttributeError:
         return response, 200, {}
@@ -356,6 +454,8 @@ def parse_response(response):
     include_response_body=DEFAULT_INCLUDE_RESPONSE_BODY,
     include_path="true",
     include_query_string="true",
+    stack_trace_policy=StackTracePolicy.ALWAYS.value,
+    stack_trace_sample_rate=1.0,
 )
 def configure_audit_decorator(graph):
     """
@@ -367,20 +467,23 @@ def configure_audit_decorator(graph):
         def login(username, password):
             ...
     """
-    include_request_body = int(graph.config.audit.include_request_body)
-    include_response_body = int(graph.config.audit.include_response_body)
-    include_path = strtobool(graph.config.audit.include_path)
-    include_query_string = strtobool(graph.config.audit.include_query_string)
+    options = AuditOptions(
+        include_request_body=int(graph.config.audit.include_request_body),
+        include_response_body=int(graph.config.audit.include_response_body),
+        include_path=strtobool(graph.config.audit.include_path),
+        include_query_string=strtobool(graph.config.audit.include_query_string),
+        stack_traces=StackTraces(
+            policy=StackTracePolicy(graph.config.audit.stack_trace_policy),
+            sample_rate=float(graph.config.audit.stack_trace_sample_rate),
+        ),
+    )
 
     def _audit(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            options = AuditOptions(
-                include_request_body=include_request_body,
-                include_response_body=include_response_body,
-                include_path=include_path,
-                include_query_string=include_query_string,
-            )
             return _audit_request(options, func, graph.request_context, *args, **kwargs)
         return wrapper
+
+    # expose the options for routes, which audit requests without a separate wrapper
+    _audit.options = options
     return _audit
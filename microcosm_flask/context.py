@@ -1,4 +1,11 @@
-from flask import request
+"""
+Per-request context.
+
+The request context (request headers with a configured prefix) is computed at most once
+per request and memoized in `flask.g`; each call returns a copy.
+
+"""
+from flask import g, request
 from microcosm.api import defaults
 
 
@@ -6,12 +13,24 @@ X_REQUEST = "X-Request"
 
 
 def context_wrapper(include_header_prefix):
+    # match against WSGI environ keys (e.g. "HTTP_X_REQUEST_ID") rather than normalizing
+    # every header name on every call
+    environ_prefix = "HTTP_{}".format(include_header_prefix.upper().replace("-", "_"))
+    memo_key = "_microcosm_flask_request_context_{}".format(environ_prefix)
+
     def retrieve_context():
-        return {
-            header: value
-            for header, value in request.headers.items()
-            if header.startswith(include_header_prefix)
-        }
+        current_request = request._get_current_object()
+        memo = g.get(memo_key)
+        if memo is None or memo[0] is not current_request:
+            environ = request.environ
+            memo = current_request, {
+                key[5:].replace("_", "-").title(): value
+                for key, value in environ.items()
+                if key.startswith(environ_prefix)
+            }
+            setattr(g, memo_key, memo)
+
+        return dict(memo[1])
 
     return retrieve_context
 
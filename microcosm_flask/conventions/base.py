@@ -5,6 +5,7 @@ Convention base class.
 from werkzeug.exceptions import NotAcceptable
 
 from microcosm_flask.conventions.encoding import find_response_format
+from microcosm_flask.conventions.registry import max_content_length
 from microcosm_flask.operations import Operation
 
 
@@ -21,14 +22,21 @@ class EndpointDefinition(tuple):
     A definition for an endpoint.
 
     """
-    def __new__(cls, func=None, request_schema=None, response_schema=None, header_func=None, response_formats=None):
+    def __new__(cls,
+                func=None,
+                request_schema=None,
+                response_schema=None,
+                header_func=None,
+                response_formats=None,
+                request_streaming=False,
+                max_content_length=None):
         """
         Define an API endpoint.
 
         Defines the behavior of an API endpoint in conjunction with a `Namespace` and an `Operation`.
 
-        Supports a callbable `func`, request and response (marshmallow) schemas, a header-modifying function, and
-        optional response formats.
+        Supports a callbable `func`, request and response (marshmallow) schemas, a header-modifying function,
+        optional response formats, optional streaming of request items, and an optional request size limit.
 
         The callable `func` should accept `**kwargs` and return a marshmallow-compatible object or dictionary.
 
@@ -40,11 +48,21 @@ class EndpointDefinition(tuple):
         :param response_schema: a marshmallow schema to encode response data
         :param header_func: a header-modifying function
         :param response_formats: an optional list of support response formats
+        :param request_streaming: whether batch endpoints accept request items as a (NDJSON) stream
+        :param max_content_length: the maximum request body size (in bytes); overrides the route default
 
         """
         return tuple.__new__(
             EndpointDefinition,
-            (func, request_schema, response_schema, header_func, response_formats),
+            (
+                func,
+                request_schema,
+                response_schema,
+                header_func,
+                response_formats,
+                request_streaming,
+                max_content_length,
+            ),
         )
 
     @property
@@ -67,6 +85,14 @@ class EndpointDefinition(tuple):
     def response_formats(self):
         return self[4] or []
 
+    @property
+    def request_streaming(self):
+        return self[5]
+
+    @property
+    def max_content_length(self):
+        return self[6]
+
 
 class Convention:
     """
@@ -92,7 +118,10 @@ class Convention:
             except AttributeError:
                 pass
             else:
-                configure_func(ns, self._make_definition(definition))
+                definition = self._make_definition(definition)
+                configure_func(ns, definition)
+                if definition.max_content_length is not None:
+                    self.limit_content_length(ns, operation, definition.max_content_length)
 
     def add_route(self, path, operation, ns):
         route = (operation.value.method, path)
@@ -104,6 +133,17 @@ class Convention:
 
         return self.graph.route(path, operation, ns)
 
+    def limit_content_length(self, ns, operation, max_length):
+        """
+        Apply a maximum request body size to an operation's endpoint.
+
+        """
+        if not isinstance(operation, Operation):
+            operation = Operation.from_name(operation)
+        view_func = self.graph.app.view_functions.get(ns.endpoint_for(operation))
+        if view_func is not None:
+            max_content_length(max_length)(view_func)
+
     def _find_func(self, operation):
         """
         Find the function to use to configure the given operation.
@@ -11,12 +11,21 @@ from microcosm_flask.conventions.encoding import (
     dump_response_data,
     encode_count_header,
     encode_id_header,
+    get_item_schema,
+    is_streaming_request,
+    iter_request_items,
     load_query_string_data,
     load_request_data,
     merge_data,
     require_response_data,
 )
-from microcosm_flask.conventions.registry import qs, request, response
+from microcosm_flask.conventions.etags import (
+    apply_versioned_etag,
+    check_cached_etag,
+    invalidate_etag,
+    invalidate_etags,
+)
+from microcosm_flask.conventions.registry import produces, qs, request, response
 from microcosm_flask.operations import Operation
 from microcosm_flask.paging import OffsetLimitPage, OffsetLimitPageSchema, identity
 
@@ -54,6 +63,7 @@ class CRUDConvention(Convention):
         @self.add_route(ns.collection_path, Operation.Search, ns)
         @qs(definition.request_schema)
         @response(paginated_list_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def search(**path_data):
             page = self.page_cls.from_query_string(definition.request_schema)
@@ -86,6 +96,7 @@ class CRUDConvention(Convention):
         """
         @self.add_route(ns.collection_path, Operation.Count, ns)
         @qs(definition.request_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def count(**path_data):
             request_data = load_query_string_data(definition.request_schema)
@@ -118,10 +129,12 @@ class CRUDConvention(Convention):
         @self.add_route(ns.collection_path, Operation.Create, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def create(**path_data):
             request_data = load_request_data(definition.request_schema)
             response_data = definition.func(**merge_data(path_data, request_data))
+            invalidate_etags(ns)
             headers = encode_id_header(response_data)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
@@ -143,20 +156,29 @@ class CRUDConvention(Convention):
         - accept kwargs for the request and path data
         - return a new item
 
+        If the definition enables request streaming, newline-delimited JSON requests will
+        pass `items` to the func as a generator of (validated) items.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
         """
         operation = Operation.UpdateBatch
+        item_schema = get_item_schema(definition.request_schema) if definition.request_streaming else None
 
         @self.add_route(ns.collection_path, operation, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def update_batch(**path_data):
             headers = dict()
-            request_data = load_request_data(definition.request_schema)
+            if item_schema is not None and is_streaming_request():
+                request_data = dict(items=iter_request_items(item_schema))
+            else:
+                request_data = load_request_data(definition.request_schema)
             response_data = definition.func(**merge_data(path_data, request_data))
+            invalidate_etags(ns)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -186,13 +208,20 @@ class CRUDConvention(Convention):
         @self.add_route(ns.instance_path, Operation.Retrieve, ns)
         @qs(request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def retrieve(**path_data):
             headers = dict()
+            response_format = self.negotiate_response_content(definition.response_formats)
+            not_modified = check_cached_etag(ns, path_data, response_format)
+            if not_modified is not None:
+                return not_modified
             request_data = load_query_string_data(request_schema)
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
             definition.header_func(headers, response_data)
-            response_format = self.negotiate_response_content(definition.response_formats)
+            not_modified = apply_versioned_etag(ns, path_data, response_data, headers, response_format)
+            if not_modified is not None:
+                return not_modified
             return dump_response_data(
                 definition.response_schema,
                 response_data,
@@ -218,11 +247,13 @@ class CRUDConvention(Convention):
 
         @self.add_route(ns.instance_path, Operation.Delete, ns)
         @qs(request_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def delete(**path_data):
             headers = dict()
             request_data = load_query_string_data(request_schema)
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
+            invalidate_etag(ns, path_data)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -250,6 +281,7 @@ class CRUDConvention(Convention):
         @self.add_route(ns.instance_path, Operation.Replace, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def replace(**path_data):
             headers = dict()
@@ -258,6 +290,7 @@ class CRUDConvention(Convention):
             # enforce these semantics at the HTTP layer. If `func` returns falsey, we
             # will raise a 404.
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
+            invalidate_etag(ns, path_data)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -284,12 +317,14 @@ class CRUDConvention(Convention):
         @self.add_route(ns.instance_path, Operation.Update, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def update(**path_data):
             headers = dict()
             # NB: using partial here means that marshmallow will not validate required fields
             request_data = load_request_data(definition.request_schema, partial=True)
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
+            invalidate_etag(ns, path_data)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -305,6 +340,10 @@ class CRUDConvention(Convention):
         """
         Register create collection endpoint.
 
+        If the definition enables request streaming, newline-delimited JSON requests will
+        pass `items` to the func as a generator of (validated) items; pagination is then
+        taken from the query string.
+
         :param ns: the namespace
         :param definition: the endpoint definition
         """
@@ -312,16 +351,22 @@ class CRUDConvention(Convention):
             ns,
             definition.response_schema,
         )()
+        item_schema = get_item_schema(definition.request_schema) if definition.request_streaming else None
 
         @self.add_route(ns.collection_path, Operation.CreateCollection, ns)
         @request(definition.request_schema)
         @response(paginated_list_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def create_collection(**path_data):
-            request_data = load_request_data(definition.request_schema)
-            # NB: if we don't filter the request body through an explicit page schema,
-            # we will leak other request arguments into the pagination query strings
-            page = self.page_cls.from_query_string(self.page_schema(), request_data)
+            if item_schema is not None and is_streaming_request():
+                request_data = dict(items=iter_request_items(item_schema))
+                page = self.page_cls.from_query_string(self.page_schema())
+            else:
+                request_data = load_request_data(definition.request_schema)
+                # NB: if we don't filter the request body through an explicit page schema,
+                # we will leak other request arguments into the pagination query strings
+                page = self.page_cls.from_query_string(self.page_schema(), request_data)
 
             result = definition.func(**merge_data(
                 path_data,
@@ -330,6 +375,7 @@ class CRUDConvention(Convention):
                     page.to_dict(func=identity),
                 ),
             ))
+            invalidate_etags(ns)
 
             response_data, headers = page.to_paginated_list(result, ns, Operation.CreateCollection)
             definition.header_func(headers, response_data)
@@ -2,14 +2,19 @@
 Support for encoding and decoding request/response content.
 
 """
+from json import loads
+
 from flask import request
 from inflection import camelize
-from werkzeug.exceptions import NotFound, UnprocessableEntity
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge, UnprocessableEntity
 
 from microcosm_flask.enums import ResponseFormats
 from microcosm_flask.naming import name_for
 
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
 def with_headers(error, headers):
     setattr(error, "headers", headers)
     return error
@@ -55,6 +60,100 @@ def encode_headers(resource):
     return {}
 
 
+TRIVIAL_SCHEMA = "_microcosm_flask_trivial_schema"
+
+
+def is_trivial_schema(schema):
+    """
+    Determine whether a schema can only ever load an empty dictionary.
+
+    Schemas without fields or processors (e.g. the `Schema()` placeholders used for
+    query strings) ignore their input entirely, so loading them can be skipped.
+
+    The result is computed once per schema (see `mark_trivial_schema`).
+
+    """
+    try:
+        return getattr(schema, TRIVIAL_SCHEMA)
+    except AttributeError:
+        return mark_trivial_schema(schema)
+
+
+def mark_trivial_schema(schema):
+    """
+    Compute (and save) whether a schema is trivial, e.g. when its route is registered.
+
+    Schemas whose processors cannot be determined are assumed to be non-trivial.
+
+    """
+    trivial = not schema.fields and not getattr(schema, "_has_processors", True)
+    setattr(schema, TRIVIAL_SCHEMA, trivial)
+    return trivial
+
+
+class MaxLengthStream:
+    """
+    A request body stream that refuses to read past a maximum length.
+
+    Used for bodies without a `Content-Length` (e.g. chunked transfer encoding).
+
+    """
+    def __init__(self, stream, max_length):
+        self.stream = stream
+        self.max_length = max_length
+        self.position = 0
+
+    def read(self, size=-1):
+        # read (at most) one byte past the limit to detect oversized bodies
+        remaining = self.max_length + 1 - self.position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.stream.read(size)
+        self.position += len(data)
+        if self.position > self.max_length:
+            raise RequestEntityTooLarge()
+        return data
+
+    def readline(self, size=-1):
+        remaining = self.max_length + 1 - self.position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.stream.readline(size)
+        self.position += len(data)
+        if self.position > self.max_length:
+            raise RequestEntityTooLarge()
+        return data
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+
+def require_content_length(max_content_length=None):
+    """
+    Reject request bodies larger than a maximum size.
+
+    Defaults to the application's `MAX_CONTENT_LENGTH` (if any).
+
+    Uses the `Content-Length` header so that oversized bodies are refused before they are read;
+    bodies of unknown length are limited as they are read instead.
+
+    :raises RequestEntityTooLarge: otherwise
+
+    """
+    if max_content_length is None:
+        max_content_length = request.max_content_length
+    if max_content_length is None:
+        return
+
+    if request.content_length is None:
+        if request.environ.get("wsgi.input_terminated") and "stream" not in request.__dict__:
+            request.environ["wsgi.input"] = MaxLengthStream(request.environ["wsgi.input"], max_content_length)
+        return
+
+    if request.content_length > max_content_length:
+        raise RequestEntityTooLarge()
+
+
 def load_request_data(request_schema, partial=False):
     """
     Load request data as JSON using the given schema.
@@ -65,8 +164,15 @@ def load_request_data(request_schema, partial=False):
     HTTP 400 and 415 errors.
 
     """
+    if is_trivial_schema(request_schema):
+        return {}
+
+    require_content_length()
+
     try:
         json_data = request.get_json(force=True) or {}
+    except RequestEntityTooLarge:
+        raise
     except Exception:
         # if `simplpejson` is installed, simplejson.scanner.JSONDecodeError will be raised
         # on malformed JSON, where as built-in `json` returns None
@@ -84,6 +190,65 @@ def load_request_data(request_schema, partial=False):
     return request_data.data
 
 
+def is_streaming_request():
+    """
+    Determine whether the request body is a stream of (newline-delimited) JSON items.
+
+    """
+    return request.mimetype == NDJSON_CONTENT_TYPE
+
+
+def get_item_schema(request_schema):
+    """
+    Find the item schema of a batch request schema.
+
+    Batch request schemas are expected to define their items as a list of nested schemas
+    under the `items` key.
+
+    """
+    try:
+        items_field = request_schema.fields["items"]
+        return getattr(items_field, "container", items_field).schema
+    except (AttributeError, KeyError):
+        raise ValueError("Request streaming requires a request schema with nested `items`")
+
+
+def iter_request_items(item_schema, partial=False):
+    """
+    Load request items one at a time from a newline-delimited JSON request body.
+
+    Reads the request stream incrementally so that memory is bounded by the largest item
+    rather than the size of the request. Validation errors are raised as items are consumed.
+
+    """
+    require_content_length()
+
+    # index items (as in `items.<index>`) rather than lines, skipping blank lines
+    lines = (line for line in request.stream if line.strip())
+    for index, line in enumerate(lines):
+        try:
+            json_data = loads(line.decode(request.charset))
+        except ValueError:
+            raise with_context(
+                UnprocessableEntity("Validation error"), [{
+                    "message": "Could not decode item: {}".format(index),
+                    "field": "items.{}".format(index),
+                    "reasons": ["Malformed JSON"],
+                }],
+            )
+
+        item_data = item_schema.load(json_data, partial=partial)
+        if item_data.errors:
+            raise with_context(
+                UnprocessableEntity("Validation error"), [{
+                    "message": "Could not validate field: items.{}.{}".format(index, field),
+                    "field": "items.{}.{}".format(index, field),
+                    "reasons": reasons
+                } for field, reasons in item_data.errors.items()],
+            )
+        yield item_data.data
+
+
 def load_query_string_data(request_schema, query_string_data=None):
     """
     Load query string data using the given schema.
@@ -91,6 +256,9 @@ def load_query_string_data(request_schema, query_string_data=None):
     Schemas are assumed to be compatible with the `PageSchema`.
 
     """
+    if is_trivial_schema(request_schema):
+        return {}
+
     if query_string_data is None:
         query_string_data = request.args
 
@@ -117,7 +285,8 @@ def dump_response_data(response_schema,
                        response_data,
                        status_code=200,
                        headers=None,
-                       response_format=None):
+                       response_format=None,
+                       include_etag=True):
     """
     Dumps response data as JSON using the given schema.
 
@@ -127,10 +296,31 @@ def dump_response_data(response_schema,
     HTTP 400 and 406 errors.
 
     """
-    if response_schema:
+    if response_schema and response_format == ResponseFormats.NDJSON:
+        response_data = iter_response_items(response_schema, response_data)
+    elif response_schema:
         response_data = response_schema.dump(response_data).data
 
-    return make_response(response_data, response_schema, response_format, status_code, headers)
+    return make_response(response_data, response_schema, response_format, status_code, headers, include_etag)
+
+
+def iter_response_items(response_schema, response_data):
+    """
+    Lazily dump response data one item at a time.
+
+    Paginated lists are streamed without their envelope; other responses are streamed as a single item.
+
+    """
+    try:
+        item_schema = get_item_schema(response_schema)
+    except ValueError:
+        return iter([response_schema.dump(response_data).data])
+
+    items = response_data["items"] if isinstance(response_data, dict) else response_data.items
+    return (
+        item_schema.dump(item).data
+        for item in items
+    )
 
 
 def make_response(response_data,
@@ -138,6 +328,7 @@ def make_response(response_data,
                   response_format=None,
                   status_code=200,
                   headers=None,
+                  include_etag=True,
                   ):
 
     if response_format is None:
@@ -147,9 +338,13 @@ def make_response(response_data,
 
     if request.headers.get("X-Response-Skip-Null"):
         # swagger does not currently support null values; remove these conditionally
-        response_data = remove_null_values(response_data)
+        if formatter.streaming:
+            # streaming formatters consume (lazily generated) items
+            response_data = map(remove_null_values, response_data)
+        else:
+            response_data = remove_null_values(response_data)
 
-    response = formatter(response_data, headers)
+    response = formatter(response_data, headers, include_etag=include_etag)
     response.status_code = status_code
     return response
 
@@ -0,0 +1,220 @@
+"""
+Resource-versioned ETags.
+
+When enabled (via the application's `ETAG_VERSIONED` setting), resources that expose a
+`version` or `updated_at` are tagged using a hash of (endpoint, path, query string, version,
+format) instead of a hash of their encoded body; `If-None-Match` requests that match are
+answered with an HTTP 304 without encoding the resource at all.
+
+A small LRU of recently seen versions (sized by `ETAG_CACHE_SIZE`) additionally allows
+`If-None-Match` to be checked before the resource is loaded. This cache is per-process:
+it is invalidated by writes made through the same process, but writes made by other
+processes (or workers) are only observed once an entry expires, so every entry lives
+for at most `ETAG_CACHE_TTL` seconds. The cache is never enabled without a TTL.
+
+"""
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from flask import Response, current_app, request
+from werkzeug.http import quote_etag, unquote_etag
+
+from microcosm_flask.formatting.base import get_etag_config
+from microcosm_flask.operations import Operation
+
+
+ETAG_CACHE = "microcosm_flask.etag_cache"
+VERSION_ATTRIBUTES = ("version", "updated_at")
+DEFAULT_ETAG_CACHE_TTL = 5.0
+
+
+class ETagCache:
+    """
+    Thread-safe LRU of resource versions with a time-to-live.
+
+    Reading an entry refreshes its LRU position but never its expiry.
+
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                version, expires_at = self.entries[key]
+            except KeyError:
+                return None
+            if expires_at < monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return version
+
+    def set(self, key, version):
+        expires_at = monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (version, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_endpoint(self, endpoint):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == endpoint]:
+                del self.entries[key]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def is_versioned():
+    return bool(current_app.config.get("ETAG_VERSIONED"))
+
+
+def get_etag_cache():
+    """
+    Resolve the current application's version cache, if configured.
+
+    Both a size and a (positive) TTL are required.
+
+    """
+    maxsize = current_app.config.get("ETAG_CACHE_SIZE")
+    ttl = current_app.config.get("ETAG_CACHE_TTL", DEFAULT_ETAG_CACHE_TTL)
+    if not maxsize or not ttl:
+        return None
+    return current_app.extensions.setdefault(
+        ETAG_CACHE,
+        ETagCache(maxsize, ttl),
+    )
+
+
+def resource_key(ns, path_data):
+    """
+    Key a resource by its retrieve endpoint and path.
+
+    """
+    return (
+        ns.endpoint_for(Operation.Retrieve),
+        tuple(sorted(path_data.items())),
+    )
+
+
+def resource_version(response_data):
+    """
+    Extract the version of a resource, if it exposes one.
+
+    """
+    for attribute in VERSION_ATTRIBUTES:
+        if isinstance(response_data, dict):
+            value = response_data.get(attribute)
+        else:
+            value = getattr(response_data, attribute, None)
+        if value is not None:
+            return value
+    return None
+
+
+def versioned_etag(version, response_format):
+    """
+    Compute a (quoted) ETag for a version of the current request's resource.
+
+    """
+    hash_func, _ = get_etag_config()
+    key = "{}|{}|{}|{}|{}".format(
+        request.endpoint,
+        sorted(request.view_args.items()),
+        request.query_string.decode("utf-8"),
+        version,
+        response_format.content_type if response_format else None,
+    )
+    return quote_etag(hash_func(key.encode("utf-8")))
+
+
+def not_modified(etag):
+    """
+    Build an HTTP 304 response if the request's `If-None-Match` matches the (quoted) ETag.
+
+    """
+    if not request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+        return None
+    return Response(status=304, headers={"ETag": etag})
+
+
+def check_cached_etag(ns, path_data, response_format):
+    """
+    Check `If-None-Match` against the last known version of a resource.
+
+    Returns an HTTP 304 response on a match and None otherwise.
+
+    """
+    if not request.if_none_match or not is_versioned():
+        return None
+
+    cache = get_etag_cache()
+    if cache is None:
+        return None
+
+    version = cache.get(resource_key(ns, path_data))
+    if version is None:
+        return None
+
+    return not_modified(versioned_etag(version, response_format))
+
+
+def apply_versioned_etag(ns, path_data, response_data, headers, response_format):
+    """
+    Tag a loaded resource with its versioned (or `header_func` provided) ETag.
+
+    Returns an HTTP 304 response if `If-None-Match` matches and None otherwise.
+
+    """
+    if not is_versioned():
+        return None
+
+    etag = headers.get("ETag")
+    if etag is None:
+        version = resource_version(response_data)
+        if version is None:
+            return None
+        cache = get_etag_cache()
+        if cache is not None:
+            cache.set(resource_key(ns, path_data), version)
+        etag = headers["ETag"] = versioned_etag(version, response_format)
+
+    return not_modified(etag)
+
+
+def invalidate_etag(ns, path_data):
+    """
+    Forget the last known version of a (modified) resource.
+
+    """
+    if not is_versioned():
+        return
+
+    cache = get_etag_cache()
+    if cache is not None:
+        cache.invalidate(resource_key(ns, path_data))
+
+
+def invalidate_etags(ns):
+    """
+    Forget the last known versions of all of a namespace's resources.
+
+    Used by writes that do not identify the modified resources by path (e.g. batches and relations).
+
+    """
+    if not is_versioned():
+        return
+
+    cache = get_etag_cache()
+    if cache is not None:
+        cache.invalidate_endpoint(ns.endpoint_for(Operation.Retrieve))
@@ -4,8 +4,24 @@ Health check convention.
 Reports service health and basic information from the "/api/health" endpoint,
 using HTTP 200/503 status codes to indicate healthiness.
 
+Checks are evaluated concurrently (on a small thread pool), each optionally subject to a
+timeout, and results may be cached between probes. A cheap liveness endpoint ("/api/health/live")
+reports that the service is up without evaluating any checks.
+
+Alternatively, checks may be evaluated by a background thread on an interval, in which case
+the health endpoint serves the most recent (pre-serialized) snapshot in constant time.
+
 """
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from distutils.util import strtobool
+from json import dumps
+from logging import getLogger
+from os import getpid
+from threading import Event, Lock, Thread
+from time import monotonic
+
+from flask import Response
 from microcosm.api import defaults
 
 from microcosm_flask.audit import skip_logging
@@ -17,10 +33,38 @@ from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
 
 
+logger = getLogger("microcosm_flask.health")
+
+
+HEALTH_CHECK_TIMEOUT = "_microcosm_flask_health_check_timeout"
+HEALTH_CHECK_TTL = "_microcosm_flask_health_check_ttl"
+
+
+def health_check(timeout=None, ttl=None):
+    """
+    Decorate a health check to declare its timeout and/or result cache TTL (in seconds).
+
+    Example Usage:
+
+        @health_check(ttl=10)
+        def check_database(graph):
+            ...
+
+    """
+    def decorator(func):
+        if timeout is not None:
+            setattr(func, HEALTH_CHECK_TIMEOUT, timeout)
+        if ttl is not None:
+            setattr(func, HEALTH_CHECK_TTL, ttl)
+        return func
+    return decorator
+
+
 class HealthResult:
-    def __init__(self, error=None, result=None):
+    def __init__(self, error=None, result=None, latency=None):
         self.error = error
         self.result = result or "ok"
+        self.latency = latency
 
     def __nonzero__(self):
         return self.error is None
@@ -32,18 +76,26 @@ class HealthResult:
         return self.result if self.error is None else self.error
 
     def to_dict(self):
-        return {
+        dct = {
             "ok": bool(self),
             "message": str(self),
         }
+        if self.latency is not None:
+            dct["latency_ms"] = round(self.latency * 1000, 3)
+        return dct
 
     @classmethod
     def evaluate(cls, func, graph):
+        start_time = monotonic()
         try:
             result = func(graph)
-            return cls(result=result)
+            return cls(result=result, latency=monotonic() - start_time)
         except Exception as error:
-            return cls(error=extract_error_message(error))
+            return cls(error=extract_error_message(error), latency=monotonic() - start_time)
+
+
+# an immutable, pre-serialized health state
+HealthSnapshot = namedtuple("HealthSnapshot", ["ok", "body"])
 
 
 class Health:
@@ -55,10 +107,31 @@ class Health:
 
     The overall health is OK if all checks are OK.
 
+    Checks run concurrently (outside of any request context; see `evaluate_check`); a check
+    that does not complete within its timeout (if any) is reported as failed (and is not
+    resubmitted until it completes). Check results are reused until their TTL (if any) expires.
+
+    With a `refresh_interval`, a background thread instead refreshes a snapshot of all checks
+    on an interval; a check only counts as failed once it fails `failure_threshold` times in a
+    row. The thread is started on first use in each process, because threads do not survive
+    a fork (e.g. under a preforking server that loads the application before forking).
+
     """
-    def __init__(self, graph, include_build_info=True):
+    def __init__(self,
+                 graph,
+                 include_build_info=True,
+                 max_workers=4,
+                 timeout=None,
+                 ttl=0,
+                 failure_threshold=1,
+                 refresh_interval=None):
         self.graph = graph
         self.name = graph.metadata.name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self.failure_threshold = failure_threshold
+        self.refresh_interval = refresh_interval
         if include_build_info:
             self.checks = dict(
                 build_num=BuildInfo.check_build_num,
@@ -67,20 +140,119 @@ class Health:
         else:
             self.checks = dict()
 
+        self.pid = getpid()
+        self.executor = None
+        self.lock = Lock()
+        self.pending = dict()
+        self.results = dict()
+
+        self.failures = dict()
+        self.snapshot = None
+        self.stopped = Event()
+        self.thread = None
+
+    def ensure_process(self):
+        """
+        Reset thread state inherited from a parent process and start the background thread
+        (if refreshing in the background and not yet started in this process).
+
+        """
+        pid = getpid()
+        if self.pid != pid:
+            self.pid = pid
+            self.lock = Lock()
+            self.executor = None
+            self.pending = dict()
+            self.failures = dict()
+            self.snapshot = None
+            self.thread = None
+
+        if self.refresh_interval is not None and self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.start(self.refresh_interval)
+
+    def current_snapshot(self):
+        """
+        Return the most recent snapshot, if any.
+
+        """
+        self.ensure_process()
+        return self.snapshot
+
+    def submit(self, key, func):
+        """
+        Submit a check for evaluation, reusing its pending evaluation (if any).
+
+        """
+        self.ensure_process()
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None and not future.done():
+                return future
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            future = self.pending[key] = self.executor.submit(self.evaluate_check, func)
+            return future
+
+    def evaluate_check(self, func):
+        """
+        Evaluate a check (on an executor thread).
+
+        Checks run within an application context, but not within a request context: checks
+        may not use `flask.request` or request-scoped state in `flask.g` (such as sessions
+        registered with `register_session_factory`) and should use the graph instead.
+
+        """
+        with self.graph.flask.app_context():
+            return HealthResult.evaluate(func, self.graph)
+
+    def evaluate(self):
+        """
+        Evaluate all checks, using cached results where possible.
+
+        """
+        start_time = monotonic()
+        results = dict()
+        futures = dict()
+
+        for key, func in list(self.checks.items()):
+            result, expires_at = self.results.get(key, (None, 0))
+            if result is not None and expires_at > start_time:
+                results[key] = result
+            else:
+                futures[key] = func, self.submit(key, func)
+
+        for key, (func, future) in futures.items():
+            timeout = getattr(func, HEALTH_CHECK_TIMEOUT, self.timeout)
+            remaining = None if timeout is None else max(0, start_time + timeout - monotonic())
+            try:
+                results[key] = future.result(timeout=remaining)
+            except TimeoutError:
+                results[key] = HealthResult(
+                    error="Timed out after {}s".format(timeout),
+                    latency=monotonic() - start_time,
+                )
+            else:
+                ttl = getattr(func, HEALTH_CHECK_TTL, self.ttl)
+                if ttl:
+                    self.results[key] = results[key], monotonic() + ttl
+
+        return results
+
     def to_dict(self):
         """
         Encode the name, the status of all checks, and the current overall status.
 
         """
-        # evaluate checks
-        checks = {
-            key: HealthResult.evaluate(func, self.graph)
-            for key, func in self.checks.items()
-        }
+        checks = self.evaluate()
+        return self.encode(checks, ok=all(checks.values()))
+
+    def encode(self, checks, ok):
         dct = dict(
             # return the service name helps for routing debugging
             name=self.name,
-            ok=all(checks.values()),
+            ok=ok,
         )
         if checks:
             dct["checks"] = {
@@ -89,30 +261,99 @@ class Health:
             }
         return dct
 
+    def refresh(self):
+        """
+        Evaluate all checks and replace the current snapshot.
+
+        """
+        checks = self.evaluate()
+        self.failures = {
+            key: 0 if result else self.failures.get(key, 0) + 1
+            for key, result in checks.items()
+        }
+        ok = all(failures < self.failure_threshold for failures in self.failures.values())
+        self.snapshot = HealthSnapshot(
+            ok=ok,
+            body=dumps(self.encode(checks, ok)).encode("utf-8"),
+        )
+        return self.snapshot
+
+    def run(self, interval):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Unable to refresh health")
+            if self.stopped.wait(interval):
+                return
+
+    def start(self, interval):
+        """
+        Start refreshing health in a background (daemon) thread.
+
+        """
+        self.refresh_interval = interval
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, args=(interval,), name="health", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.refresh_interval = None
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
 
 class HealthConvention(Convention):
 
-    def __init__(self, graph, include_build_info=False):
+    def __init__(self, graph, include_build_info=False, **kwargs):
         super(HealthConvention, self).__init__(graph)
-        self.health = Health(graph, include_build_info)
+        self.health = Health(graph, include_build_info, **kwargs)
 
     def configure_retrieve(self, ns, definition):
 
         @self.add_route(ns.singleton_path, Operation.Retrieve, ns)
         @skip_logging
         def current_health():
+            snapshot = self.health.current_snapshot()
+            if snapshot is not None:
+                return Response(
+                    snapshot.body,
+                    status=200 if snapshot.ok else 503,
+                    mimetype="application/json",
+                )
+
             response_data = self.health.to_dict()
             status_code = 200 if response_data["ok"] else 503
             return make_response(response_data, status_code=status_code)
 
+    def configure_liveness(self, ns):
+        """
+        Register a liveness endpoint, which evaluates no checks.
+
+        """
+        @self.add_route(ns.singleton_path, Operation.Retrieve, ns)
+        @skip_logging
+        def current_liveness():
+            return make_response(dict(name=self.health.name, ok=True))
+
 
 @defaults(
     include_build_info="true",
+    max_workers=4,
+    check_timeout=None,
+    check_ttl=0,
+    refresh_interval=None,
+    failure_threshold=1,
 )
 def configure_health(graph):
     """
     Configure the health endpoint.
 
+    If `refresh_interval` is set, checks are evaluated in the background (every
+    `refresh_interval` seconds, starting on first use in each process) instead of on request.
+
     :returns: a handle to the `Health` object, allowing other components to
               manipulate health state.
     """
@@ -121,6 +362,21 @@ def configure_health(graph):
     )
 
     include_build_info = strtobool(graph.config.health_convention.include_build_info)
-    convention = HealthConvention(graph, include_build_info)
+    check_timeout = graph.config.health_convention.check_timeout
+    refresh_interval = graph.config.health_convention.refresh_interval
+    convention = HealthConvention(
+        graph,
+        include_build_info,
+        max_workers=int(graph.config.health_convention.max_workers),
+        timeout=float(check_timeout) if check_timeout is not None else None,
+        ttl=float(graph.config.health_convention.check_ttl),
+        failure_threshold=int(graph.config.health_convention.failure_threshold),
+        refresh_interval=float(refresh_interval) if refresh_interval is not None else None,
+    )
     convention.configure(ns, retrieve=tuple())
+    convention.configure_liveness(Namespace(
+        subject="live",
+        qualifier="health",
+    ))
+
     return convention.health
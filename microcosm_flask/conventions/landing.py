@@ -1,32 +1,111 @@
 """
 Landing Page convention.
 
+The landing page's static inputs (package information, configuration, swagger versions)
+and its template are computed once; health is refreshed in the background and the
+rendered page is cached for a short time.
+
 """
 from distutils import dist
 from io import StringIO
-from json import dumps
+from json import dumps, loads
+from threading import Lock, Thread
+from time import monotonic
 
 from jinja2 import Template
+from microcosm.api import defaults
 from microcosm_flask.conventions.registry import iter_endpoints
 from microcosm_flask.templates.landing import template
-from pkg_resources import DistributionNotFound, get_distribution
 
 
-def configure_landing(graph):   # noqa: C901
+def read_package_metadata(name):
+    """
+    Read the metadata (PKG-INFO) of an installed distribution, if any.
 
-    def get_properties_and_version():
-        """
-        Parse the properties from the package information
+    Prefers `importlib.metadata` where available, because importing `pkg_resources`
+    scans every installed distribution.
 
-        """
+    """
+    try:
+        from importlib.metadata import PackageNotFoundError, distribution
+    except ImportError:
+        from pkg_resources import DistributionNotFound, get_distribution
         try:
-            distribution = get_distribution(graph.metadata.name)
-            metadata_str = distribution.get_metadata(distribution.PKG_INFO)
-            package_info = dist.DistributionMetadata()
-            package_info.read_pkg_file(StringIO(metadata_str))
-            return package_info
+            pkg_resources_distribution = get_distribution(name)
         except DistributionNotFound:
             return None
+        return pkg_resources_distribution.get_metadata(pkg_resources_distribution.PKG_INFO)
+
+    try:
+        return distribution(name).read_text("METADATA") or distribution(name).read_text("PKG-INFO")
+    except PackageNotFoundError:
+        return None
+
+
+def get_properties_and_version(name):
+    """
+    Parse the properties from the package information
+
+    """
+    metadata_str = read_package_metadata(name)
+    if metadata_str is None:
+        return None
+    package_info = dist.DistributionMetadata()
+    package_info.read_pkg_file(StringIO(metadata_str))
+    return package_info
+
+
+def pretty_dict(dict_):
+    return dumps(dict_, sort_keys=True, indent=2, separators=(',', ': '))
+
+
+def get_env_file_commands(config, conf_key, conf_string=None):
+    if conf_string is None:
+        conf_string = []
+    for key, value in config.items():
+        if isinstance(value, dict):
+            get_env_file_commands(value, "{}__{}".format(conf_key, key), conf_string)
+        else:
+            conf_string.append("export {}__{}='{}'".format(conf_key.upper(), key.upper(), value))
+    return conf_string
+
+
+class BackgroundValue:
+    """
+    A value that is refreshed in the background.
+
+    Readers receive the most recent value without waiting (except for the very first read).
+
+    """
+    def __init__(self, func):
+        self.func = func
+        self.value = None
+        self.lock = Lock()
+        self.refreshing = False
+
+    def get(self):
+        if self.value is None:
+            self.value = self.func()
+            return self.value
+
+        with self.lock:
+            if not self.refreshing:
+                self.refreshing = True
+                Thread(target=self.refresh, daemon=True).start()
+
+        return self.value
+
+    def refresh(self):
+        try:
+            self.value = self.func()
+        finally:
+            self.refreshing = False
+
+
+@defaults(
+    cache_ttl=1,
+)
+def configure_landing(graph):   # noqa: C901
 
     def get_swagger_versions():
         """
@@ -49,19 +128,6 @@ def configure_landing(graph):   # noqa: C901
 
         return versions
 
-    def pretty_dict(dict_):
-        return dumps(dict_, sort_keys=True, indent=2, separators=(',', ': '))
-
-    def get_env_file_commands(config, conf_key, conf_string=None):
-        if conf_string is None:
-            conf_string = []
-        for key, value in config.items():
-            if isinstance(value, dict):
-                get_env_file_commands(value, "{}__{}".format(conf_key, key), conf_string)
-            else:
-                conf_string.append("export {}__{}='{}'".format(conf_key.upper(), key.upper(), value))
-        return conf_string
-
     def get_links(swagger_versions, properties):
         # add links set in config
         links = {key: value for (key, value) in graph.config.landing_convention.get("links", {}).items()}
@@ -76,24 +142,55 @@ def configure_landing(graph):   # noqa: C901
 
         return links
 
-    @graph.flask.route("/")
-    def render_landing_page():
+    def get_static_inputs():
         """
-        Render landing page
+        Compute the inputs that do not change while the service runs.
+
+        Deferred until the first request so that routes registered after this convention
+        (e.g. swagger) are included.
 
         """
         config = graph.config_convention.to_dict()
-        env = get_env_file_commands(config, graph.metadata.name)
-        health = graph.health_convention.to_dict()
-        properties = get_properties_and_version()
+        properties = get_properties_and_version(graph.metadata.name)
         swagger_versions = get_swagger_versions()
 
-        return Template(template).render(
+        return dict(
             config=pretty_dict(config),
             description=properties.description if properties else None,
-            env=env,
-            health=pretty_dict(health),
+            env=get_env_file_commands(config, graph.metadata.name),
             links=get_links(swagger_versions, properties),
             service_name=graph.metadata.name,
             version=getattr(properties, 'version', None),
         )
+
+    def get_health():
+        # use the health convention's own (background) snapshot if there is one
+        snapshot = graph.health_convention.current_snapshot()
+        if snapshot is not None:
+            return loads(snapshot.body.decode("utf-8"))
+        return graph.health_convention.to_dict()
+
+    landing_template = Template(template)
+    cache_ttl = float(graph.config.landing_convention.cache_ttl)
+    health = BackgroundValue(get_health)
+    cache = dict()
+
+    @graph.flask.route("/")
+    def render_landing_page():
+        """
+        Render landing page
+
+        """
+        page, expires_at = cache.get("page", (None, 0))
+        if page is not None and expires_at > monotonic():
+            return page
+
+        if "inputs" not in cache:
+            cache["inputs"] = get_static_inputs()
+
+        page = landing_template.render(
+            health=pretty_dict(health.get()),
+            **cache["inputs"]
+        )
+        cache["page"] = page, monotonic() + cache_ttl
+        return page
@@ -2,6 +2,10 @@
 Support for registering function metadata.
 
 """
+from functools import lru_cache
+
+from marshmallow import Schema
+from microcosm_flask.conventions.encoding import mark_trivial_schema
 from microcosm_flask.namespaces import Namespace
 from werkzeug.exceptions import InternalServerError
 from werkzeug.routing import parse_rule
@@ -10,6 +14,8 @@ from werkzeug.routing import parse_rule
 REQUEST = "__request__"
 RESPONSE = "__response__"
 QS = "__qs__"
+PRODUCES = "__produces__"
+MAX_CONTENT_LENGTH = "__max_content_length__"
 
 
 def iter_endpoints(graph, match_func):
@@ -46,7 +52,12 @@ def get_converter(rule):
     parse_url returns the dynamic rule part in the second iteration if its dynamic
 
     """
-    for converter, _, _ in parse_rule(str(rule)):
+    return _get_converter(str(rule))
+
+
+@lru_cache(maxsize=4096)
+def _get_converter(rule):
+    for converter, _, _ in parse_rule(rule):
         if converter is not None:
             return converter
     return None
@@ -57,6 +68,9 @@ def request(schema):
     Decorate a function with a request schema.
 
     """
+    if isinstance(schema, Schema):
+        mark_trivial_schema(schema)
+
     def wrapper(func):
         setattr(func, REQUEST, schema)
         return func
@@ -79,12 +93,37 @@ def qs(schema):
     Decorate a function with a query string schema.
 
     """
+    if isinstance(schema, Schema):
+        mark_trivial_schema(schema)
+
     def wrapper(func):
         setattr(func, QS, schema)
         return func
     return wrapper
 
 
+def produces(response_formats):
+    """
+    Decorate a function with its (non-default) response formats.
+
+    """
+    def wrapper(func):
+        setattr(func, PRODUCES, response_formats)
+        return func
+    return wrapper
+
+
+def max_content_length(max_length):
+    """
+    Decorate a function with a maximum request body size (in bytes).
+
+    """
+    def wrapper(func):
+        setattr(func, MAX_CONTENT_LENGTH, max_length)
+        return func
+    return wrapper
+
+
 def get_request_schema(func):
     return getattr(func, REQUEST, None)
 
@@ -95,3 +134,11 @@ def get_response_schema(func):
 
 def get_qs_schema(func):
     return getattr(func, QS, None)
+
+
+def get_response_formats(func):
+    return getattr(func, PRODUCES, None)
+
+
+def get_max_content_length(func):
+    return getattr(func, MAX_CONTENT_LENGTH, None)
@@ -18,11 +18,21 @@ from microcosm_flask.conventions.encoding import (
     merge_data,
     require_response_data,
 )
-from microcosm_flask.conventions.registry import qs, request, response
+from microcosm_flask.conventions.etags import invalidate_etags
+from microcosm_flask.conventions.registry import produces, qs, request, response
 from microcosm_flask.operations import Operation
 from microcosm_flask.paging import identity, OffsetLimitPage
 
 
+def invalidate_relation_etags(ns):
+    """
+    Forget the cached versions of both sides of a (modified) relation.
+
+    """
+    invalidate_etags(ns)
+    invalidate_etags(ns.object_ns)
+
+
 class RelationConvention(Convention):
 
     @property
@@ -47,10 +57,12 @@ class RelationConvention(Convention):
         @self.add_route(ns.relation_path, Operation.CreateFor, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def create(**path_data):
             request_data = load_request_data(definition.request_schema)
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
+            invalidate_relation_etags(ns)
             headers = encode_id_header(response_data)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
@@ -77,11 +89,13 @@ class RelationConvention(Convention):
 
         """
         @self.add_route(ns.relation_path, Operation.DeleteFor, ns)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def delete(**path_data):
             headers = dict()
             response_data = dict()
             require_response_data(definition.func(**path_data))
+            invalidate_relation_etags(ns)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -116,11 +130,13 @@ class RelationConvention(Convention):
         @self.add_route(ns.relation_path, Operation.ReplaceFor, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def replace(**path_data):
             headers = dict()
             request_data = load_request_data(definition.request_schema)
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
+            invalidate_relation_etags(ns)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -155,11 +171,13 @@ class RelationConvention(Convention):
         @self.add_route(ns.relation_path, Operation.UpdateFor, ns)
         @request(definition.request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def replace(**path_data):
             headers = dict()
             request_data = load_request_data(definition.request_schema)
             response_data = require_response_data(definition.func(**merge_data(path_data, request_data)))
+            invalidate_relation_etags(ns)
             definition.header_func(headers, response_data)
             response_format = self.negotiate_response_content(definition.response_formats)
             return dump_response_data(
@@ -191,6 +209,7 @@ class RelationConvention(Convention):
         @self.add_route(ns.relation_path, Operation.RetrieveFor, ns)
         @qs(request_schema)
         @response(definition.response_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def retrieve(**path_data):
             headers = dict()
@@ -231,6 +250,7 @@ class RelationConvention(Convention):
         @self.add_route(ns.relation_path, Operation.SearchFor, ns)
         @qs(definition.request_schema)
         @response(paginated_list_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def search(**path_data):
             page = self.page_cls.from_query_string(definition.request_schema)
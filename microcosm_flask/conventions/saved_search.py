@@ -11,7 +11,7 @@ from microcosm_flask.conventions.encoding import (
     load_request_data,
     merge_data,
 )
-from microcosm_flask.conventions.registry import request, response
+from microcosm_flask.conventions.registry import produces, request, response
 from microcosm_flask.operations import Operation
 from microcosm_flask.paging import identity, OffsetLimitPage
 
@@ -45,6 +45,7 @@ class SavedSearchConvention(Convention):
         @self.add_route(ns.collection_path, Operation.SavedSearch, ns)
         @request(definition.request_schema)
         @response(paginated_list_schema)
+        @produces(definition.response_formats)
         @wraps(definition.func)
         def saved_search(**path_data):
             request_data = load_request_data(definition.request_schema)
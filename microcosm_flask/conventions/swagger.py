@@ -3,7 +3,15 @@ Swagger (OpenAPI) convention.
 
 Exposes swagger definitions for matching operations.
 
+Definitions may also be generated offline (see `microcosm_flask.swagger.cli`) and served
+from a pre-built artifact, configured via `swagger_convention.artifact_dir`.
+
 """
+from distutils.util import strtobool
+from json import load
+from logging import getLogger
+from os.path import exists, join
+
 from flask import g
 
 from microcosm.api import defaults
@@ -12,7 +20,42 @@ from microcosm_flask.conventions.encoding import make_response
 from microcosm_flask.conventions.registry import iter_endpoints
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.operations import Operation
-from microcosm_flask.swagger.definitions import build_swagger
+
+
+logger = getLogger("microcosm_flask.swagger")
+
+
+SWAGGER_NAMESPACE = "__swagger_namespace__"
+
+
+def get_swagger_namespace(func):
+    return getattr(func, SWAGGER_NAMESPACE, None)
+
+
+def swagger_artifact_path(artifact_dir, ns):
+    """
+    Name the pre-built swagger artifact for a namespace (by version).
+
+    """
+    filename = "swagger-{}.json".format(ns.version) if ns.version else "swagger.json"
+    return join(artifact_dir, filename)
+
+
+def load_swagger_artifact(artifact_dir, ns):
+    """
+    Load a pre-built swagger artifact, if configured and present.
+
+    """
+    if artifact_dir is None:
+        return None
+
+    path = swagger_artifact_path(artifact_dir, ns)
+    if not exists(path):
+        logger.warning("Swagger artifact not found; generating swagger at runtime: {}".format(path))
+        return None
+
+    with open(path) as infile:
+        return load(infile)
 
 
 class SwaggerConvention(Convention):
@@ -40,25 +83,49 @@ class SwaggerConvention(Convention):
 
         return list(iter_endpoints(self.graph, match_func))
 
+    def build_swagger(self, ns):
+        """
+        Generate the swagger definition for a swagger namespace.
+
+        Must be called within a request context.
+
+        """
+        # NB: swagger generation (and openapi) is only imported once swagger is requested
+        from microcosm_flask.swagger.definitions import build_swagger
+
+        return build_swagger(
+            self.graph,
+            ns,
+            self.find_matching_endpoints(ns),
+            validate=strtobool(self.graph.config.swagger_convention.validate),
+        )
+
     def configure_discover(self, ns, definition):
         """
         Register a swagger endpoint for a set of operations.
 
         """
+        artifact = load_swagger_artifact(self.graph.config.swagger_convention.artifact_dir, ns)
+
         @self.add_route(ns.singleton_path, Operation.Discover, ns)
         def discover():
-            swagger = build_swagger(self.graph, ns, self.find_matching_endpoints(ns))
+            swagger = artifact if artifact is not None else self.build_swagger(ns)
             g.hide_body = True
             return make_response(swagger)
 
+        setattr(discover, SWAGGER_NAMESPACE, ns)
+
 
 @defaults(
+    artifact_dir=None,
     name="swagger",
     operations=[
         "create",
         "create_collection",
         "create_for",
         "delete",
+        "finalize_upload",
+        "initiate_upload",
         "replace",
         "replace_for",
         "retrieve",
@@ -69,8 +136,10 @@ class SwaggerConvention(Convention):
         "update_batch",
         "update_for",
         "upload",
+        "upload_chunk",
         "upload_for",
     ],
+    validate="true",
     version="",
 )
 def configure_swagger(graph):
@@ -1,45 +1,283 @@
 """
 Conventions for file upload.
 
+Uploads are handed to controllers in one of several modes (see `UploadMode`):
+
+ -  By default, each file is saved to a temporary directory and controllers receive its path.
+
+ -  In streaming modes, controllers receive file-like objects over the buffers that the
+    multipart parser writes into, avoiding a second write to (and read from) disk.
+
+In all modes, a per-file size limit may be enforced while the request is parsed.
+
+Given a hash algorithm, each file's digest is computed while the multipart parser writes
+it (rather than by reading the file again) and controllers receive `HashedUpload` tuples;
+an optional dedup function can skip storing files whose digest is already known.
+
+Large files may instead be uploaded in chunks (see `configure_finalizeupload`), which are
+kept in a (pluggable) chunk storage until the upload is finalized.
+
+Given a worker count, files are persisted concurrently and controllers decorated with
+`per_file_upload` are invoked once per file, in parallel.
+
 """
-from contextlib import contextmanager
-from functools import wraps
-from os.path import join
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from enum import Enum, unique
+from fcntl import LOCK_EX, flock
+from io import SEEK_END
+from functools import partial, wraps
+from hashlib import new as new_hash
+from os import listdir, makedirs
+from os.path import getsize, join
 from shutil import rmtree
-from tempfile import mkdtemp
+from tempfile import SpooledTemporaryFile, TemporaryFile, gettempdir, mkdtemp
+from threading import Lock
+from uuid import uuid4
 
-from flask import request
-from marshmallow import Schema
+from flask import _request_ctx_stack, current_app, request
+from marshmallow import Schema, fields
 from microcosm_flask.conventions.base import Convention
 from microcosm_flask.conventions.encoding import (
     dump_response_data,
     load_query_string_data,
     merge_data,
+    with_context,
 )
 from microcosm_flask.conventions.registry import qs, response
 from microcosm_flask.operations import Operation
-from werkzeug.exceptions import BadRequest
+from werkzeug.exceptions import BadRequest, Conflict, NotFound, RequestEntityTooLarge
+from werkzeug.formparser import default_stream_factory, parse_form_data
 from werkzeug.utils import secure_filename
 
 
-try:
-    # Python 2
-    from contextlib import nested
-except ImportError:
-    # Python3
-    from contextlib import ExitStack
+# matches werkzeug's default in-memory threshold
+DEFAULT_SPOOL_SIZE = 500 * 1024
+
+PER_FILE_UPLOAD = "_microcosm_flask_per_file_upload"
+
+HASH_CHUNK_SIZE = 64 * 1024
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+# an uploaded file and its content digest; `file` is None for duplicates (see `dedup_func`)
+HashedUpload = namedtuple("HashedUpload", ["formname", "file", "filename", "digest"])
+
+
+class InitiateUploadSchema(Schema):
+    filename = fields.String(required=True)
+
+
+class UploadChunkSchema(Schema):
+    offset = fields.Integer(required=True)
+
+
+class ChunkedUploadSchema(Schema):
+    id = fields.UUID(required=True)
+    offset = fields.Integer(required=True)
+
+
+@unique
+class UploadMode(Enum):
+    # files are saved to a temporary directory; controllers receive (formname, filepath, filename)
+    TEMPORARY = "temporary"
+    # controllers receive (formname, fileobj, filename), buffered in anonymous temporary files
+    STREAM = "stream"
+    # as STREAM, but files smaller than the spool size are kept in memory
+    SPOOLED = "spooled"
+
+
+class LimitedUploadStream:
+    """
+    An upload buffer that enforces a maximum size (and optionally computes a content hash)
+    as the multipart parser writes to it.
+
+    """
+    def __init__(self, buffer, max_size=None, hash_algorithm=None):
+        self.buffer = buffer
+        self.max_size = max_size
+        self.size = 0
+        self.hasher = new_hash(hash_algorithm) if hash_algorithm else None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge("Uploaded file exceeds {} bytes".format(self.max_size))
+        if self.hasher is not None:
+            self.hasher.update(data)
+        return self.buffer.write(data)
+
+    def __iter__(self):
+        return iter(self.buffer)
+
+    def __getattr__(self, name):
+        return getattr(self.buffer, name)
+
+
+def make_stream_factory(upload_mode, max_file_size=None, spool_size=DEFAULT_SPOOL_SIZE, hash_algorithm=None):
+    """
+    Create a (werkzeug) stream factory for uploaded files.
+
+    """
+    def stream_factory(total_content_length, content_type, filename=None, content_length=None):
+        if upload_mode == UploadMode.STREAM:
+            buffer = TemporaryFile("wb+")
+        elif upload_mode == UploadMode.SPOOLED:
+            buffer = SpooledTemporaryFile(max_size=spool_size, mode="wb+")
+        else:
+            buffer = default_stream_factory(total_content_length, filename, content_type, content_length)
+        return LimitedUploadStream(buffer, max_file_size, hash_algorithm)
+
+    return stream_factory
+
+
+def load_upload_files(stream_factory=None):
+    """
+    Parse uploaded files (and form data), using a custom stream factory if one is provided.
+
+    A custom stream factory (which enforces file size limits and computes digests) only applies
+    if the request's form data is parsed here; parsing it earlier (e.g. by accessing
+    `request.form` in a `before_request` hook) is an error.
+
+    """
+    if stream_factory is None:
+        return request.files
+
+    if "form" in request.__dict__ or "files" in request.__dict__:
+        raise RuntimeError("Upload form data was parsed before upload limits could be applied")
+
+    _, form, files = parse_form_data(
+        request.environ,
+        stream_factory=stream_factory,
+        charset=request.charset,
+        errors=request.encoding_errors,
+        max_form_memory_size=request.max_form_memory_size,
+        max_content_length=request.max_content_length,
+        cls=request.parameter_storage_class,
+    )
+    # expose the parsed data as usual
+    request.form, request.files = form, files
+    return files
+
+
+def per_file_upload(func):
+    """
+    Decorate an upload function so that it is invoked once per uploaded file.
+
+    Each invocation receives a list containing a single file; invocations run concurrently
+    if the convention has workers and their (non-None) results are aggregated as `items`.
+
+    Concurrent invocations run on worker threads within a copy of the request context, but
+    with a new application context: `flask.g` is empty (e.g. sessions registered with
+    `register_session_factory` are not available), so any such state must be resolved
+    without `flask.g` (e.g. from the graph).
+
+    """
+    setattr(func, PER_FILE_UPLOAD, True)
+    return func
+
+
+def is_per_file_upload(func):
+    return getattr(func, PER_FILE_UPLOAD, False)
+
+
+def gather(futures):
+    """
+    Wait for all futures to complete and return their results (raising the first error).
+
+    Waiting for every future ensures that no work is still running once an error propagates.
+
+    """
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+def share_request_context(func):
+    """
+    Wrap a function to run (on another thread) within the current request's context.
+
+    Unlike `flask.copy_current_request_context`, leaving the shared context neither runs
+    teardown handlers nor closes the request, whose uploaded files are still in use.
+    The function gets a fresh application context (and hence an empty `g`).
+
+    """
+    app = current_app._get_current_object()
+    context = _request_ctx_stack.top.copy()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            _request_ctx_stack.push(context)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _request_ctx_stack.pop()
+
+    return wrapper
+
+
+def enter_contexts(stack, contexts, executor=None):
+    """
+    Enter context managers (optionally concurrently), registering their exits on an `ExitStack`.
+
+    """
+    if executor is None:
+        return [stack.enter_context(context) for context in contexts]
+
+    futures = [executor.submit(share_request_context(context.__enter__)) for context in contexts]
+    wait(futures)
+    for context, future in zip(contexts, futures):
+        if future.exception() is None:
+            stack.push(context)
+    return [future.result() for future in futures]
+
+
+def upload_digest(fileobj):
+    """
+    Resolve the (hex) digest of an uploaded file, as computed while parsing.
+
+    """
+    return fileobj.stream.hasher.hexdigest()
+
+
+def stream_digest(stream, hash_algorithm):
+    hasher = new_hash(hash_algorithm)
+    for chunk in iter(partial(stream.read, HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@contextmanager
+def hashed_upload(upload_context, name, fileobj, hash_algorithm, dedup_func=None):
+    """
+    Add a content digest to an upload, skipping storage of known duplicates.
+
+    :param dedup_func: called with the digest; if it returns a truthy value, the file is not
+                       stored and the upload's `file` is None
 
-    @contextmanager
-    def nested(*contexts):
-        """
-        Reimplementation of nested in python 3.
-        """
-        with ExitStack() as stack:
-            results = [
-                stack.enter_context(context)
-                for context in contexts
-            ]
-            yield results
+
+    """
+    digest = upload_digest(fileobj)
+    if dedup_func is not None and dedup_func(digest):
+        fileobj.close()
+        yield HashedUpload(name, None, fileobj.filename, digest)
+        return
+
+    with upload_context(name, fileobj) as (name, file_, filename):
+        yield HashedUpload(name, file_, filename, digest)
+
+
+@contextmanager
+def streaming_upload(name, fileobj):
+    """
+    Expose an uploaded file as a file-like object (rather than a path).
+
+    """
+    try:
+        yield name, fileobj, fileobj.filename
+    finally:
+        fileobj.close()
 
 
 @contextmanager
@@ -61,12 +299,237 @@ def temporary_upload(name, fileobj):
         rmtree(tempdir)
 
 
+class LocalChunkStorage:
+    """
+    Stores chunked uploads on local disk, one directory per upload.
+
+    Chunk storage backends must implement `create`, `append`, `open`, `digest`, and `delete`;
+    uploads that are never finalized are not removed.
+
+    Appends to the same upload are serialized (across threads and processes) with a file lock.
+    Given a hash algorithm, each upload's digest is updated as chunks are appended; digests
+    that are not available (e.g. for uploads appended to by another process) are computed by
+    reading the upload.
+
+    """
+    def __init__(self, root, hash_algorithm=None, max_hashers=256):
+        self.root = root
+        self.hash_algorithm = hash_algorithm
+        self.max_hashers = max_hashers
+        # running hashes (and the size they cover) by upload id
+        self.hashers = OrderedDict()
+        self.lock = Lock()
+
+    def upload_dir(self, upload_id):
+        return join(self.root, str(upload_id))
+
+    def create(self, filename):
+        """
+        Create an (empty) upload and return its id.
+
+        """
+        upload_id = uuid4()
+        upload_dir = self.upload_dir(upload_id)
+        makedirs(upload_dir)
+        open(join(upload_dir, secure_filename(filename) or "upload"), "wb").close()
+        if self.hash_algorithm is not None:
+            self.set_hasher(upload_id, 0, new_hash(self.hash_algorithm))
+        return upload_id
+
+    def open(self, upload_id):
+        """
+        Resolve an upload's (filepath, filename).
+
+        """
+        upload_dir = self.upload_dir(upload_id)
+        try:
+            filename, = listdir(upload_dir)
+        except (OSError, ValueError):
+            raise NotFound("No such upload: {}".format(upload_id))
+        return join(upload_dir, filename), filename
+
+    def append(self, upload_id, offset, stream, max_size=None):
+        """
+        Append a chunk to an upload at an offset and return the upload's new size.
+
+        A chunk that fails (including one that exceeds the maximum size) is discarded
+        so that it can be retried at the same offset.
+
+        """
+        filepath, _ = self.open(upload_id)
+        with open(filepath, "r+b") as fileobj:
+            # held until the file is closed
+            flock(fileobj, LOCK_EX)
+
+            size = fileobj.seek(0, SEEK_END)
+            if offset != size:
+                message = "Upload {} is at offset {}".format(upload_id, size)
+                error = with_context(Conflict(message), [dict(message=message)])
+                error.context["offset"] = size
+                raise error
+
+            hasher = self.get_hasher(upload_id, size)
+            try:
+                for chunk in iter(partial(stream.read, COPY_CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise RequestEntityTooLarge("Uploaded file exceeds {} bytes".format(max_size))
+                    fileobj.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+            except BaseException:
+                fileobj.truncate(offset)
+                raise
+            self.set_hasher(upload_id, size, hasher)
+        return size
+
+    def digest(self, upload_id, hash_algorithm):
+        """
+        Compute the (hex) digest of an upload.
+
+        """
+        filepath, _ = self.open(upload_id)
+        if hash_algorithm == self.hash_algorithm:
+            hasher = self.get_hasher(upload_id, getsize(filepath))
+            if hasher is not None:
+                return hasher.hexdigest()
+
+        with open(filepath, "rb") as fileobj:
+            return stream_digest(fileobj, hash_algorithm)
+
+    def get_hasher(self, upload_id, size):
+        """
+        Get (a copy of) an upload's running hash, if it covers exactly `size` bytes.
+
+        """
+        with self.lock:
+            hashed_size, hasher = self.hashers.get(upload_id, (None, None))
+            if hashed_size != size:
+                return None
+            return hasher.copy()
+
+    def set_hasher(self, upload_id, size, hasher):
+        with self.lock:
+            if hasher is None:
+                self.hashers.pop(upload_id, None)
+                return
+            self.hashers[upload_id] = size, hasher
+            self.hashers.move_to_end(upload_id)
+            while len(self.hashers) > self.max_hashers:
+                self.hashers.popitem(last=False)
+
+    def delete(self, upload_id):
+        self.set_hasher(upload_id, None, None)
+        rmtree(self.upload_dir(upload_id), ignore_errors=True)
+
+
 class UploadConvention(Convention):
 
-    def __init__(self, graph, exclude_func=None):
+    def __init__(self,
+                 graph,
+                 exclude_func=None,
+                 upload_mode=UploadMode.TEMPORARY,
+                 max_file_size=None,
+                 spool_size=DEFAULT_SPOOL_SIZE,
+                 max_workers=None,
+                 hash_algorithm=None,
+                 dedup_func=None,
+                 chunk_storage=None):
         Convention.__init__(self, graph)
 
         self.exclude_func = exclude_func or (lambda name, fileobj: False)
+        self.upload_mode = upload_mode
+        self.max_file_size = max_file_size
+        self.hash_algorithm = hash_algorithm
+        self.dedup_func = dedup_func
+        if upload_mode == UploadMode.TEMPORARY and max_file_size is None and hash_algorithm is None:
+            # use werkzeug's default stream handling
+            self.stream_factory = None
+        else:
+            self.stream_factory = make_stream_factory(upload_mode, max_file_size, spool_size, hash_algorithm)
+        self.max_workers = max_workers
+        self._executor = None
+        self.chunk_storage = chunk_storage or LocalChunkStorage(
+            join(gettempdir(), "{}-uploads".format(graph.metadata.name)),
+            hash_algorithm=hash_algorithm,
+        )
+
+    @property
+    def upload_context(self):
+        if self.upload_mode == UploadMode.TEMPORARY:
+            upload_context = temporary_upload
+        else:
+            upload_context = streaming_upload
+
+        if self.hash_algorithm is None:
+            return upload_context
+        return partial(
+            hashed_upload,
+            upload_context,
+            hash_algorithm=self.hash_algorithm,
+            dedup_func=self.dedup_func,
+        )
+
+    @property
+    def executor(self):
+        if self.max_workers is None:
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    @contextmanager
+    def chunked_upload(self, upload_id):
+        """
+        Expose a (complete) chunked upload as an uploaded file.
+
+        The upload is removed from chunk storage once it has been processed successfully.
+
+        """
+        filepath, filename = self.chunk_storage.open(upload_id)
+        digest = None
+        if self.hash_algorithm is not None:
+            digest = self.chunk_storage.digest(upload_id, self.hash_algorithm)
+
+        if digest is not None and self.dedup_func is not None and self.dedup_func(digest):
+            yield HashedUpload("file", None, filename, digest)
+        elif self.upload_mode == UploadMode.TEMPORARY:
+            yield self.with_digest(("file", filepath, filename), digest)
+        else:
+            with open(filepath, "rb") as fileobj:
+                yield self.with_digest(("file", fileobj, filename), digest)
+
+        self.chunk_storage.delete(upload_id)
+
+    def with_digest(self, upload, digest):
+        if self.hash_algorithm is None:
+            return upload
+        return HashedUpload(*upload, digest)
+
+    def invoke(self, func, files, **kwargs):
+        """
+        Invoke an upload function, once per file if it was declared `per_file_upload`.
+
+        """
+        if not is_per_file_upload(func):
+            return func(files, **kwargs)
+
+        calls = [
+            partial(func, [file_], **kwargs)
+            for file_ in files
+        ]
+        if self.executor is None:
+            results = [call() for call in calls]
+        else:
+            results = gather([
+                self.executor.submit(share_request_context(call))
+                for call in calls
+            ])
+
+        items = [result for result in results if result is not None]
+        if not items:
+            return None
+        return dict(items=items)
 
     def create_upload_func(self, ns, definition, path, operation):
         request_schema = definition.request_schema or Schema()
@@ -75,20 +538,22 @@ class UploadConvention(Convention):
         @self.add_route(path, operation, ns)
         @wraps(definition.func)
         def upload(**path_data):
+            files = load_upload_files(self.stream_factory)
             merged_data = merge_data(request.args.to_dict(), request.form.to_dict())
             request_data = load_query_string_data(request_schema, merged_data)
 
-            if not request.files:
+            if not files:
                 raise BadRequest("No files were uploaded")
 
             uploads = [
-                temporary_upload(name, fileobj)
+                self.upload_context(name, fileobj)
                 for name, fileobj
-                in request.files.items()
+                in files.items()
                 if not self.exclude_func(name, fileobj)
             ]
-            with nested(*uploads) as files:
-                response_data = definition.func(files, **merge_data(path_data, request_data))
+            with ExitStack() as stack:
+                files = enter_contexts(stack, uploads, self.executor)
+                response_data = self.invoke(definition.func, files, **merge_data(path_data, request_data))
                 if response_data is None:
                     return "", 204
 
@@ -100,6 +565,66 @@ class UploadConvention(Convention):
             upload = response(definition.response_schema)(upload)
         return upload
 
+    def configure_finalizeupload(self, ns, definition):
+        """
+        Register chunked (resumable) upload endpoints.
+
+        Clients initiate an upload (with a filename), append chunks to it at explicit offsets
+        (so that a failed chunk can be retried), and then finalize it. Chunks are kept in the
+        convention's chunk storage in the meantime, so no worker is held between chunks.
+
+        The definition's func should be an upload function (see `configure_upload`); it is
+        invoked on finalize with a single file named "file".
+
+        :param ns: the namespace
+        :param definition: the endpoint definition
+
+        """
+        path = ns.collection_path + "/upload"
+        upload_path = path + "/<uuid:upload_id>"
+        request_schema = definition.request_schema or Schema()
+        response_schema = definition.response_schema or Schema()
+
+        @self.add_route(path, Operation.InitiateUpload, ns)
+        @qs(InitiateUploadSchema())
+        @response(ChunkedUploadSchema())
+        def initiate_upload():
+            request_data = load_query_string_data(InitiateUploadSchema())
+            upload_id = self.chunk_storage.create(request_data["filename"])
+            return dump_response_data(
+                ChunkedUploadSchema(),
+                dict(id=upload_id, offset=0),
+                Operation.InitiateUpload.value.default_code,
+            )
+
+        @self.add_route(upload_path, Operation.UploadChunk, ns)
+        @qs(UploadChunkSchema())
+        @response(ChunkedUploadSchema())
+        def upload_chunk(upload_id):
+            request_data = load_query_string_data(UploadChunkSchema())
+            offset = self.chunk_storage.append(upload_id, request_data["offset"], request.stream, self.max_file_size)
+            return dump_response_data(ChunkedUploadSchema(), dict(id=upload_id, offset=offset))
+
+        @self.add_route(upload_path, Operation.FinalizeUpload, ns)
+        @wraps(definition.func)
+        def finalize_upload(upload_id):
+            request_data = load_query_string_data(request_schema)
+            with self.chunked_upload(upload_id) as file_:
+                response_data = self.invoke(definition.func, [file_], **request_data)
+
+            if response_data is None:
+                return "", 204
+            return dump_response_data(response_schema, response_data, Operation.FinalizeUpload.value.default_code)
+
+        if definition.request_schema:
+            finalize_upload = qs(definition.request_schema)(finalize_upload)
+        if definition.response_schema:
+            finalize_upload = response(definition.response_schema)(finalize_upload)
+
+        initiate_upload.__doc__ = "Initiate a chunked upload of a {}".format(ns.subject_name)
+        upload_chunk.__doc__ = "Upload a chunk of a {}".format(ns.subject_name)
+        finalize_upload.__doc__ = "Finalize a chunked upload of a {}".format(ns.subject_name)
+
     def configure_upload(self, ns, definition):
         """
         Register an upload endpoint.
@@ -107,8 +632,13 @@ class UploadConvention(Convention):
         The definition's func should be an upload function, which must:
         - accept kwargs for path data and query string parameters
         - accept a list of tuples of the form (formname, tempfilepath, filename)
+          (or (formname, fileobj, filename) in streaming upload modes, with a trailing
+          digest if the convention has a hash algorithm)
         - optionally return a resource
 
+        If the func is decorated with `per_file_upload`, it is invoked once per file and
+        its results are returned as `items`.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
@@ -123,8 +653,13 @@ class UploadConvention(Convention):
         The definition's func should be an upload function, which must:
         - accept kwargs for path data and query string parameters
         - accept a list of tuples of the form (formname, tempfilepath, filename)
+          (or (formname, fileobj, filename) in streaming upload modes, with a trailing
+          digest if the convention has a hash algorithm)
         - optionall return a resource
 
+        If the func is decorated with `per_file_upload`, it is invoked once per file and
+        its results are returned as `items`.
+
         :param ns: the namespace
         :param definition: the endpoint definition
 
@@ -133,10 +668,13 @@ class UploadConvention(Convention):
         upload_for.__doc__ = "Upload a {} for a {}".format(ns.subject_name, ns.object_name)
 
 
-def configure_upload(graph, ns, mappings, exclude_func=None):
+def configure_upload(graph, ns, mappings, exclude_func=None, **kwargs):
     """
     Register Upload endpoints for a resource object.
 
+    :param kwargs: upload options for `UploadConvention` (e.g. `upload_mode`, `max_file_size`,
+                   `max_workers`, `hash_algorithm`)
+
     """
-    convention = UploadConvention(graph, exclude_func)
+    convention = UploadConvention(graph, exclude_func, **kwargs)
     convention.configure(ns, mappings)
@@ -2,9 +2,12 @@ from collections import namedtuple
 from enum import Enum, unique
 
 from microcosm_flask.formatting import (
+    ArrowFormatter,
     CSVFormatter,
     JSONFormatter,
     HTMLFormatter,
+    MessagePackFormatter,
+    NDJSONFormatter,
     TextFormatter,
 )
 
@@ -28,11 +31,26 @@ class ResponseFormats(Enum):
         formatter=HTMLFormatter,
         priority=10,
     )
+    NDJSON = ResponseFormatSpec(
+        content_type=NDJSONFormatter.CONTENT_TYPE,
+        formatter=NDJSONFormatter,
+        priority=120,
+    )
     TEXT = ResponseFormatSpec(
         content_type=TextFormatter.CONTENT_TYPE,
         formatter=TextFormatter,
         priority=150,
     )
+    MSGPACK = ResponseFormatSpec(
+        content_type=MessagePackFormatter.CONTENT_TYPE,
+        formatter=MessagePackFormatter,
+        priority=160,
+    )
+    ARROW = ResponseFormatSpec(
+        content_type=ArrowFormatter.CONTENT_TYPE,
+        formatter=ArrowFormatter,
+        priority=170,
+    )
 
     @property
     def content_type(self):
@@ -1,9 +1,14 @@
 """
 Generalized error handling.
 
+Errors without a custom context (e.g. most werkzeug exceptions) are answered with
+cached response bodies, so that floods of routine errors (404s, 401s) stay cheap.
+
 """
-from logging import getLogger
+from functools import lru_cache
+from logging import DEBUG, getLogger
 
+from flask import Response, g, has_request_context, jsonify
 from marshmallow import fields, Schema
 from werkzeug.exceptions import default_exceptions
 
@@ -12,6 +17,11 @@ from microcosm_flask.conventions.encoding import dump_response_data
 
 error_logger = getLogger("errors")
 
+# sentinel for missing attributes (which may legitimately be set to None)
+MISSING = object()
+
+REQUEST_ERROR = "_microcosm_flask_request_error"
+
 
 class SubErrorSchema(Schema):
     message = fields.String(required=True)
@@ -44,16 +54,12 @@ def extract_status_code(error):
     Extract an error code from a message.
 
     """
-    try:
-        return int(error.code)
-    except (AttributeError, TypeError, ValueError):
+    for attribute in ("code", "status_code", "errno"):
         try:
-            return int(error.status_code)
+            return int(getattr(error, attribute))
         except (AttributeError, TypeError, ValueError):
-            try:
-                return int(error.errno)
-            except (AttributeError, TypeError, ValueError):
-                return 500
+            continue
+    return 500
 
 
 def extract_error_message(error):
@@ -65,13 +71,15 @@ def extract_error_message(error):
     name in the event that the attribute value was set to a uselessly empty string.
 
     """
-    try:
-        return error.description or error.__class__.__name__
-    except AttributeError:
-        try:
-            return str(error.message) or error.__class__.__name__
-        except AttributeError:
-            return str(error) or error.__class__.__name__
+    description = getattr(error, "description", MISSING)
+    if description is not MISSING:
+        return description or error.__class__.__name__
+
+    message = getattr(error, "message", MISSING)
+    if message is not MISSING:
+        return str(message) or error.__class__.__name__
+
+    return str(error) or error.__class__.__name__
 
 
 def extract_context(error):
@@ -101,13 +109,58 @@ def extract_headers(error):
     Extract HTTP headers to include in response.
 
     """
+    headers = getattr(error, "headers", MISSING)
+    if headers is not MISSING:
+        return headers
+
+    get_headers = getattr(error, "get_headers", None)
+    if get_headers is None:
+        return {}
     try:
-        return error.headers
-    except AttributeError:
-        try:
-            return error.get_headers()
-        except (AttributeError, TypeError):
-            return {}
+        return get_headers()
+    except TypeError:
+        return {}
+
+
+def extract_response_headers(error):
+    """
+    Extract HTTP headers to include in a JSON error response.
+
+    Drops any content type (e.g. werkzeug's "text/html") because error bodies are always JSON.
+
+    """
+    headers = extract_headers(error)
+    items = headers.items() if hasattr(headers, "items") else headers
+    return [
+        (key, value)
+        for key, value in items
+        if key.lower() != "content-type"
+    ]
+
+
+def error_body(status_code, message, retryable):
+    """
+    Encode the body of an error without a custom context.
+
+    Bodies are cached unless the message (e.g. a werkzeug description) is not hashable.
+
+    """
+    try:
+        return cached_error_body(status_code, message, retryable)
+    except TypeError:
+        return encode_error_body(status_code, message, retryable)
+
+
+def encode_error_body(status_code, message, retryable):
+    return jsonify(
+        code=status_code,
+        context={"errors": []},
+        message=message,
+        retryable=retryable,
+    ).get_data()
+
+
+cached_error_body = lru_cache(maxsize=256)(encode_error_body)
 
 
 def extract_include_stack_trace(error):
@@ -118,23 +171,53 @@ def extract_include_stack_trace(error):
     return getattr(error, "include_stack_trace", True)
 
 
+def record_request_error(error):
+    """
+    Record that the current request raised an error (even if the error is handled).
+
+    Flask only passes errors that escape the error handlers to `teardown_request`.
+
+    """
+    if has_request_context():
+        setattr(g, REQUEST_ERROR, error)
+
+
+def get_request_error():
+    """
+    Get the error (if any) raised by the current request.
+
+    """
+    return g.get(REQUEST_ERROR)
+
+
 def make_json_error(error):
     """
-    Handle errors by logging and
+    Handle errors by logging and encoding them as JSON.
+
+    Error responses are never tagged with an ETag.
+
     """
+    record_request_error(error)
+
     message = extract_error_message(error)
     status_code = extract_status_code(error)
-    context = extract_context(error)
+    context = getattr(error, "context", MISSING)
     retryable = extract_retryable(error)
-    headers = extract_headers(error)
+    headers = extract_response_headers(error)
 
     # Flask will not log user exception (fortunately), but will log an error
     # for exceptions that escape out of the application entirely (e.g. if the
     # error handler raises an error)
-    error_logger.debug("Handling {} error: {}".format(
-        status_code,
-        message,
-    ))
+    if error_logger.isEnabledFor(DEBUG):
+        error_logger.debug("Handling %s error: %s", status_code, message)
+
+    if context is MISSING:
+        return Response(
+            error_body(status_code, message, retryable),
+            status=status_code,
+            headers=headers,
+            mimetype="application/json",
+        )
 
     # Serialize into JSON response
     response_data = {
@@ -144,7 +227,7 @@ def make_json_error(error):
         "retryable": retryable,
     }
     # Don't pass in the error schema because it will suppress any extra fields
-    return dump_response_data(None, response_data, status_code, headers)
+    return dump_response_data(None, response_data, status_code, headers, include_etag=False)
 
 
 def configure_error_handlers(graph):
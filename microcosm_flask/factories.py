@@ -2,16 +2,25 @@
 Factories to configure Flask.
 
 """
+from distutils.util import strtobool
+
 from flask import Flask
 
 from microcosm.api import defaults
 import microcosm.opaque  # noqa
 
+from microcosm_flask.formatting.hashing import get_etag_hash
+
 
 @defaults(
     port=5000,
     enable_profiling=False,
     profile_dir=None,
+    etag_hash=None,
+    etag_max_size=None,
+    etag_versioned=False,
+    etag_cache_size=0,
+    etag_cache_ttl=5,
 )
 def configure_flask(graph):
     """
@@ -31,6 +40,20 @@ def configure_flask(graph):
         if not isinstance(value, dict)
     })
 
+    # fail fast on unknown (or uninstalled) hash functions
+    get_etag_hash(graph.config.flask.etag_hash)
+    app.config["ETAG_HASH"] = graph.config.flask.etag_hash
+    if graph.config.flask.etag_max_size is not None:
+        app.config["ETAG_MAX_SIZE"] = int(graph.config.flask.etag_max_size)
+
+    # resource-versioned etags (and a per-process cache of recently seen versions)
+    #
+    # The cache does not observe writes made by other processes; its TTL bounds how long
+    # they may serve stale 304s, so the cache stays disabled unless the TTL is positive.
+    app.config["ETAG_VERSIONED"] = strtobool(str(graph.config.flask.etag_versioned))
+    app.config["ETAG_CACHE_SIZE"] = int(graph.config.flask.etag_cache_size)
+    app.config["ETAG_CACHE_TTL"] = float(graph.config.flask.etag_cache_ttl or 0)
+
     return app
 
 
@@ -5,7 +5,6 @@ A URI valued (and normalized) field.
 from operator import itemgetter
 
 from marshmallow.fields import Field, ValidationError
-from rfc3986 import uri_reference
 
 
 DEFAULT_PORTS = {
@@ -27,6 +26,9 @@ def normalize_uri_result(uri):
     Normalize a URI (And return a URIResult)
 
     """
+    # NB: imported on first use to keep importing fields cheap
+    from rfc3986 import uri_reference
+
     ref = uri_reference(uri).normalize()
 
     return ref._replace(
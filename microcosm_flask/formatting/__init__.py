@@ -1,4 +1,7 @@
+from microcosm_flask.formatting.arrow_formatter import ArrowFormatter  # noqa
 from microcosm_flask.formatting.csv_formatter import CSVFormatter  # noqa
 from microcosm_flask.formatting.html_formatter import HTMLFormatter  # noqa
 from microcosm_flask.formatting.json_formatter import JSONFormatter  # noqa
+from microcosm_flask.formatting.msgpack_formatter import MessagePackFormatter  # noqa
+from microcosm_flask.formatting.ndjson_formatter import NDJSONFormatter  # noqa
 from microcosm_flask.formatting.text_formatter import TextFormatter  # noqa
@@ -0,0 +1,122 @@
+"""
+Apache Arrow (IPC stream) response formatting.
+
+Encodes (paginated) lists of items as a single columnar record batch, using the response
+schema's field types to choose column types.
+
+`pyarrow` is imported on first use because it is expensive to import.
+
+"""
+from json import dumps
+
+from marshmallow import fields
+
+from microcosm_flask.formatting.base import BaseFormatter
+
+
+# column types by (marshmallow) field type; unlisted fields are encoded as (JSON) strings
+#
+# numeric fields with `as_string` are encoded as strings; decimals are encoded as decimals
+# if the field has fixed `places` and as (coerced) floats otherwise
+ARROW_TYPES = {
+    fields.Boolean: "bool_",
+    fields.Float: "float64",
+    fields.Integer: "int64",
+    fields.Number: "float64",
+    fields.String: "string",
+}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise ImportError("Arrow responses require `pyarrow`")
+    return pyarrow
+
+
+def arrow_type_for(pyarrow, field):
+    if getattr(field, "as_string", False):
+        return pyarrow.string()
+
+    if isinstance(field, fields.Decimal) and field.places is not None:
+        return pyarrow.decimal128(38, -field.places.as_tuple().exponent)
+
+    for cls in type(field).__mro__:
+        if cls in ARROW_TYPES:
+            return getattr(pyarrow, ARROW_TYPES[cls])()
+    return None
+
+
+def encode_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    return dumps(value, default=str)
+
+
+def encode_float(value):
+    if value is None:
+        return value
+    return float(value)
+
+
+class ArrowFormatter(BaseFormatter):
+
+    CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+    @property
+    def content_type(self):
+        return ArrowFormatter.CONTENT_TYPE
+
+    @property
+    def item_schema(self):
+        """
+        The schema of each item (row), if known.
+
+        """
+        if self.response_schema is None:
+            return None
+
+        items_field = self.response_schema.fields.get("items")
+        if items_field is None:
+            return self.response_schema
+
+        return getattr(items_field, "container", items_field).schema
+
+    def iter_columns(self, pyarrow, list_response_data):
+        if self.item_schema is not None:
+            for name, field in self.item_schema.fields.items():
+                if field.load_only:
+                    continue
+                yield field.dump_to or name, arrow_type_for(pyarrow, field)
+        elif list_response_data:
+            for name in list_response_data[0].keys():
+                yield name, None
+
+    def format(self, response_data):
+        pyarrow = import_pyarrow()
+
+        if "items" in response_data:
+            list_response_data = response_data["items"]
+        else:
+            list_response_data = [response_data]
+
+        arrays, names = [], []
+        for name, arrow_type in self.iter_columns(pyarrow, list_response_data):
+            values = [item.get(name) for item in list_response_data]
+            if arrow_type is None or pyarrow.types.is_string(arrow_type):
+                values = [encode_value(value) for value in values]
+                arrow_type = pyarrow.string()
+            elif pyarrow.types.is_floating(arrow_type):
+                # e.g. decimals
+                values = [encode_float(value) for value in values]
+            arrays.append(pyarrow.array(values, type=arrow_type))
+            names.append(name)
+
+        batch = pyarrow.RecordBatch.from_arrays(arrays, names=names)
+        sink = pyarrow.BufferOutputStream()
+        writer = pyarrow.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        writer.close()
+        return sink.getvalue().to_pybytes()
@@ -3,19 +3,40 @@ Response formatting base class.
 
 """
 from abc import ABCMeta, abstractmethod
-from binascii import hexlify
-try:
-    import spooky
-except ImportError:
-    spooky = None
 
-from flask import Response
+from flask import Response, current_app, has_app_context
 from werkzeug.http import quote_etag
 from werkzeug.utils import get_content_type
 
+from microcosm_flask.formatting.hashing import get_etag_hash
+
+
+def get_etag_config():
+    """
+    Resolve the ETag hash function and maximum body size from the current application (if any).
+
+    """
+    if not has_app_context():
+        return get_etag_hash(), None
+    return get_etag_hash(current_app.config.get("ETAG_HASH")), current_app.config.get("ETAG_MAX_SIZE")
+
+
+def response_view(response):
+    """
+    Expose a response body as a `memoryview` without joining or copying it where possible.
+
+    """
+    chunks = response.response
+    if isinstance(chunks, list) and len(chunks) == 1 and isinstance(chunks[0], bytes):
+        return memoryview(chunks[0])
+    return memoryview(response.get_data())
+
 
 class BaseFormatter(metaclass=ABCMeta):
 
+    # streaming formatters generate their body lazily
+    streaming = False
+
     def __init__(self, response_schema=None):
         # Formatting could need the response schema
         # e.g. to specify column ordering in CSV response
@@ -49,24 +70,23 @@ class BaseFormatter(metaclass=ABCMeta):
         """
         Add an etag to the response body.
 
-        Uses spooky where possible because it is empirically fast and well-regarded.
-
-        See: http://blog.reverberate.org/2012/01/state-of-hash-functions-2012.html
+        ETags are omitted for streamed bodies (which cannot be hashed without consuming them)
+        and for bodies larger than the application's `ETAG_MAX_SIZE` (if any); an ETag that
+        was already provided (e.g. by a `header_func` or a resource version) is preserved.
 
         """
-        if not include_etag:
+        if not include_etag or self.streaming or "ETag" in response.headers:
             return
 
-        if not spooky:
-            # use built-in md5
-            response.add_etag()
+        hash_func, max_size = get_etag_config()
+
+        if max_size is not None:
+            content_length = response.calculate_content_length()
+            if content_length is not None and content_length > max_size:
+                return
+
+        data = response_view(response)
+        if max_size is not None and data.nbytes > max_size:
             return
 
-        # use spooky
-        response.headers["ETag"] = quote_etag(
-            hexlify(
-                spooky.hash128(
-                    response.get_data(),
-                ).to_bytes(16, "little"),
-            ).decode("utf-8"),
-        )
+        response.headers["ETag"] = quote_etag(hash_func(data))
@@ -3,11 +3,93 @@ CSV response formatting.
 
 """
 from csv import writer, QUOTE_MINIMAL
+from functools import lru_cache
 from io import StringIO
+from operator import itemgetter
 
 from microcosm_flask.formatting.base import BaseFormatter
 
 
+def nested_keys(item, column_order):
+    """
+    Compute the (top-level) keys of an item that should be flattened.
+
+    Keys that are named in the column order are never flattened.
+
+    """
+    excluded = set(column_order or ())
+    return frozenset(
+        key
+        for key, value in item.items()
+        if isinstance(value, dict) and key not in excluded
+    )
+
+
+def flatten(item, prefix="", keys=None):
+    """
+    Flatten nested dictionaries into a single dictionary with dotted keys.
+
+    :param keys: if given, only flatten these keys (at the top level)
+
+    """
+    flattened = dict()
+    for key, value in item.items():
+        if isinstance(value, dict) and (keys is None or key in keys):
+            flattened.update(flatten(value, "{}{}.".format(prefix, key)))
+        else:
+            flattened[prefix + key] = value
+    return flattened
+
+
+def make_getters(column_names):
+    """
+    Create functions that extract a tuple of column values from a row.
+
+    The first (faster) function requires every column; the second extracts missing
+    columns as empty values.
+
+    """
+    if not column_names:
+        return (lambda item: ()), (lambda item: ())
+
+    getter = itemgetter(*column_names)
+    if len(column_names) == 1:
+        # itemgetter returns a bare value (rather than a tuple) for a single item
+        strict_getter = getter
+
+        def getter(item):
+            return (strict_getter(item),)
+
+    def lenient_getter(item):
+        return tuple(item.get(column_name, "") for column_name in column_names)
+
+    return getter, lenient_getter
+
+
+@lru_cache(maxsize=256)
+def make_column_plan(column_order, response_fields):
+    """
+    Compute the column names and a row extraction function for a (partial) column order.
+
+    Plans are cached; the extraction functions (see `make_getters`) return a tuple of
+    column values for a row.
+
+    """
+    if column_order is None:
+        # We should still be able to return a CSV even if no column order has been specified
+        column_names = response_fields
+    else:
+        # The column order be only partially specified
+        ordered = set(column_order)
+        column_names = column_order + tuple(
+            field_name
+            for field_name in response_fields
+            if field_name not in ordered
+        )
+
+    return (column_names,) + make_getters(column_names)
+
+
 class CSVFormatter(BaseFormatter):
 
     CONTENT_TYPE = "text/csv"
@@ -23,45 +105,64 @@ class CSVFormatter(BaseFormatter):
 
         return headers
 
-    def get_column_names(self, list_response_data):
-        response_fields = list(list_response_data[0].keys())
-
+    def get_column_order(self):
         column_order = getattr(self.response_schema, "csv_column_order", None)
         if column_order is None:
-            # We should still be able to return a CSV even if no column order has been specified
-            column_names = response_fields
-        else:
-            column_names = self.response_schema.csv_column_order
+            return None
+        return tuple(column_order)
 
-            # The column order be only partially specified
-            column_names.extend([field_name for field_name in response_fields if field_name not in column_names])
+    def get_column_plan(self, item, keys=None):
+        column_order = self.get_column_order()
+        if keys is None:
+            keys = nested_keys(item, column_order)
+        return make_column_plan(column_order, tuple(flatten(item, keys=keys).keys()))
 
-        return column_names
+    def get_column_names(self, list_response_data):
+        column_names, _, _ = self.get_column_plan(list_response_data[0])
+        return list(column_names)
 
     def format(self, response_data):
         """
         Make Flask `Response` object, with data returned as a generator for the CSV content
         The CSV is built from JSON-like object (Python `dict` or list of `dicts`)
 
+        Nested objects are flattened into columns with dotted names (e.g. "address.city"),
+        unless they are named in the schema's column order.
+
         """
         if "items" in response_data:
             list_response_data = response_data["items"]
         else:
             list_response_data = [response_data]
 
-        write_column_names = type(list_response_data[0]) not in (tuple, list)
-
         output = StringIO()
         csv_writer = writer(output, quoting=QUOTE_MINIMAL)
 
-        if write_column_names:
-            column_names = self.get_column_names(list_response_data)
-            csv_writer.writerow(column_names)
+        if not list_response_data:
+            column_order = self.get_column_order()
+            if column_order:
+                csv_writer.writerow(column_order)
+        elif type(list_response_data[0]) in (tuple, list):
+            csv_writer.writerows(list_response_data)
+        else:
+            # flatten the nested values of the first row (in every row)
+            keys = nested_keys(list_response_data[0], self.get_column_order())
 
-        for item in list_response_data:
-            csv_writer.writerow(
-                [item[column] for column in column_names] if write_column_names else list(item)
-            )
+            def iter_rows():
+                if keys:
+                    return (flatten(item, keys=keys) for item in list_response_data)
+                return iter(list_response_data)
+
+            column_names, getter, lenient_getter = self.get_column_plan(list_response_data[0], keys)
+            csv_writer.writerow(column_names)
+            position = output.tell()
+            try:
+                csv_writer.writerows(map(getter, iter_rows()))
+            except KeyError:
+                # some row is missing a column; start over, allowing for missing columns
+                output.seek(position)
+                output.truncate()
+                csv_writer.writerows(map(lenient_getter, iter_rows()))
 
         # Ideally we'd want to `yield` each line to stream the content
         # But something downstream seems to break streaming
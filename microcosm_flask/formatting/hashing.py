@@ -0,0 +1,79 @@
+"""
+Hash functions for response ETags.
+
+Hash functions are registered by name and operate on bytes-like objects, so that response
+bodies can be hashed through a `memoryview` without copying them.
+
+Uses spooky by default where possible because it is empirically fast and well-regarded.
+
+See: http://blog.reverberate.org/2012/01/state-of-hash-functions-2012.html
+
+"""
+from binascii import hexlify
+from hashlib import blake2b, md5
+try:
+    import spooky
+except ImportError:
+    spooky = None
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+ETAG_HASHES = dict()
+
+
+def etag_hash(name):
+    """
+    Register an ETag hash function.
+
+    The function should accept a bytes-like object and return a hex digest.
+
+    """
+    def decorator(func):
+        ETAG_HASHES[name] = func
+        return func
+    return decorator
+
+
+@etag_hash("md5")
+def md5_hash(data):
+    # equivalent to werkzeug's `Response.add_etag`
+    return md5(data).hexdigest()
+
+
+@etag_hash("blake2")
+def blake2_hash(data):
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+if spooky:
+    @etag_hash("spooky")
+    def spooky_hash(data):
+        # spooky only accepts bytes; views over an entire bytes object can be unwrapped without copying
+        if isinstance(data, memoryview):
+            data = data.obj if isinstance(data.obj, bytes) and data.nbytes == len(data.obj) else data.tobytes()
+        return hexlify(spooky.hash128(data).to_bytes(16, "little")).decode("utf-8")
+
+
+if xxhash:
+    @etag_hash("xxhash")
+    def xxhash_hash(data):
+        return xxhash.xxh64(data).hexdigest()
+
+
+DEFAULT_ETAG_HASH = "spooky" if spooky else "md5"
+
+
+def get_etag_hash(name=None):
+    """
+    Resolve an ETag hash function by name.
+
+    :raises ValueError: if the hash function is unknown (or not installed)
+
+    """
+    try:
+        return ETAG_HASHES[name or DEFAULT_ETAG_HASH]
+    except KeyError:
+        raise ValueError("Unknown ETag hash: {}".format(name))
@@ -0,0 +1,26 @@
+"""
+MessagePack response formatting.
+
+`msgpack` is imported on first use, so that services that never produce MessagePack
+do not pay for it at startup.
+
+"""
+from microcosm_flask.formatting.base import BaseFormatter
+
+
+class MessagePackFormatter(BaseFormatter):
+
+    CONTENT_TYPE = "application/x-msgpack"
+
+    @property
+    def content_type(self):
+        return MessagePackFormatter.CONTENT_TYPE
+
+    def format(self, response_data):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("MessagePack responses require `msgpack`")
+
+        # values without a native encoding (e.g. UUIDs in raw fields) are encoded as strings
+        return msgpack.packb(response_data, use_bin_type=True, default=str)
@@ -0,0 +1,30 @@
+"""
+Newline-delimited JSON response formatting.
+
+"""
+from flask import json, stream_with_context
+
+from microcosm_flask.formatting.base import BaseFormatter
+
+
+class NDJSONFormatter(BaseFormatter):
+
+    CONTENT_TYPE = "application/x-ndjson"
+
+    streaming = True
+
+    @property
+    def content_type(self):
+        return NDJSONFormatter.CONTENT_TYPE
+
+    def format(self, response_data):
+        """
+        Stream one JSON object per line from an iterable of (encoded) items.
+
+        Items are generated lazily within the request context (e.g. so that links can be built).
+
+        """
+        return stream_with_context(
+            "{}\n".format(json.dumps(item))
+            for item in response_data
+        )
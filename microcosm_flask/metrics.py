@@ -1,9 +1,10 @@
 """
-Metrics extensions for routes.
+Metrics extensions for routes and sessions.
 
 """
 try:
     from microcosm_metrics.classifier import Classifier
+    from microcosm_metrics.naming import name_for
 except ImportError:
     raise Exception("Route metrics require 'microcosm-metrics'")
 
@@ -24,3 +25,13 @@ class StatusCodeClassifier(Classifier):
     def label_error(self, error):
         status_code = extract_status_code(error)
         return str(status_code)
+
+
+def record_session_pool_metrics(graph, key, stats):
+    """
+    Report session pool stats as gauges.
+
+    """
+    tags = [f"session:{key}"]
+    for name, value in stats.items():
+        graph.metrics.gauge(name_for("session_pool", name), value, tags=tags)
@@ -5,7 +5,7 @@ In conjunction with the `Operation` enum, defines a naming convention for HTTP e
 which in turn provides a discovery mechanism API routes.
 
 """
-from re import match
+from functools import lru_cache, wraps
 from urllib.parse import urlencode, urljoin
 
 from flask import request, url_for
@@ -22,6 +22,29 @@ from microcosm_flask.naming import (
 from microcosm_flask.operations import Operation
 
 
+CACHE = "_cache"
+
+
+def memoized(func):
+    """
+    Memoize a (derived) value of a namespace.
+
+    Values are cached on the namespace instance and discarded whenever any attribute
+    of the namespace changes.
+
+    """
+    @wraps(func)
+    def wrapper(self, *args):
+        cache = self.__dict__.setdefault(CACHE, {})
+        key = (func.__name__,) + args
+        try:
+            return cache[key]
+        except KeyError:
+            value = cache[key] = func(self, *args)
+            return value
+    return wrapper
+
+
 class Namespace:
     """
     Encapsulates the namespace for one or more operations.
@@ -64,7 +87,13 @@ class Namespace:
         self.identifier_key = identifier_key
         self.identifier_type = identifier_type
 
+    def __setattr__(self, name, value):
+        # derived paths and names depend on the namespace's attributes
+        self.__dict__.pop(CACHE, None)
+        super().__setattr__(name, value)
+
     @property
+    @memoized
     def path(self):
         """
         Build the path (prefix) leading up to this namespace.
@@ -94,33 +123,41 @@ class Namespace:
         )
 
     @property
+    @memoized
     def subject_name(self):
         return name_for(self.subject)
 
     @property
+    @memoized
     def object_name(self):
         return name_for(self.object_)
 
     @property
+    @memoized
     def collection_path(self):
         return self.path + collection_path_for(self.subject)
 
     @property
+    @memoized
     def instance_path(self):
         return self.path + instance_path_for(self.subject, self.identifier_type, self.identifier_key)
 
     @property
+    @memoized
     def alias_path(self):
         return self.path + alias_path_for(self.subject)
 
     @property
+    @memoized
     def relation_path(self):
         return self.path + relation_path_for(self.subject, self.object_, self.identifier_type, self.identifier_key)
 
     @property
+    @memoized
     def singleton_path(self):
         return self.path + singleton_path_for(self.subject)
 
+    @memoized
     def endpoint_for(self, operation):
         """
         Create a (unique) endpoint name from an operation and a namespace.
@@ -144,16 +181,8 @@ class Namespace:
         Convert an endpoint name into an (operation, ns) tuple.
 
         """
-        # compute the operation
-        parts = endpoint.split(".")
-        operation = Operation.from_name(parts[1])
-
-        # extract its parts
-        matcher = match(operation.endpoint_pattern, endpoint)
-        if not matcher:
-            raise InternalServerError("Malformed operation endpoint: {}".format(endpoint))
-        kwargs = matcher.groupdict()
-        del kwargs["operation"]
+        operation, parts = parse_endpoint_parts(endpoint)
+        kwargs = dict(parts)
         if identifier_type is not None:
             kwargs["identifier_type"] = identifier_type
         return operation, Namespace(**kwargs)
@@ -184,3 +213,27 @@ class Namespace:
             url,
             "{}{}".format(qs_character, urlencode(qs)) if qs else "",
         )
+
+
+@lru_cache(maxsize=4096)
+def parse_endpoint_parts(endpoint):
+    """
+    Convert an endpoint name into an (operation, parts) tuple.
+
+    The parts are the (immutable) keyword arguments of the endpoint's namespace. Endpoints
+    are parsed for every rule whenever routes are iterated, so results are memoized.
+
+    """
+    # compute the operation
+    operation = Operation.from_name(endpoint.split(".")[1])
+
+    # extract its parts
+    matcher = operation.endpoint_regex.match(endpoint)
+    if not matcher:
+        raise InternalServerError("Malformed operation endpoint: {}".format(endpoint))
+
+    return operation, tuple(
+        (key, value)
+        for key, value in matcher.groupdict().items()
+        if key != "operation"
+    )
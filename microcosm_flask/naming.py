@@ -2,6 +2,7 @@
 Naming conventions.
 
 """
+from functools import lru_cache
 from inspect import isclass
 
 from inflection import underscore
@@ -19,6 +20,18 @@ def name_for(obj):
 
     cls = obj if isclass(obj) else obj.__class__
 
+    return _name_for_class(cls)
+
+
+@lru_cache(maxsize=1024)
+def _name_for_class(cls):
+    """
+    Get a name for a class.
+
+    Memoized because `underscore` is comparatively expensive and names are resolved
+    for every path, endpoint, and link.
+
+    """
     if hasattr(cls, "__alias__"):
         return underscore(cls.__alias__)
     else:
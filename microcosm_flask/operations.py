@@ -6,6 +6,7 @@ allowing easy construction of links or audit trails for external consumption.
 
 """
 from collections import namedtuple
+from re import compile as compile_regex
 
 from enum import Enum, unique
 
@@ -56,16 +57,20 @@ class Operation(Enum):
     Upload = OperationInfo("upload", "POST", NODE_PATTERN, 200)
     UploadFor = OperationInfo("upload_for", "POST", EDGE_PATTERN, 200)
 
+    # chunked (resumable) file upload operations
+    InitiateUpload = OperationInfo("initiate_upload", "POST", NODE_PATTERN, 201)
+    UploadChunk = OperationInfo("upload_chunk", "PATCH", NODE_PATTERN, 200)
+    FinalizeUpload = OperationInfo("finalize_upload", "POST", NODE_PATTERN, 200)
+
     # ad hoc operations
     Command = OperationInfo("command", "POST", NODE_PATTERN, 200)
     Query = OperationInfo("query", "GET", NODE_PATTERN, 200)
 
     @classmethod
     def from_name(cls, name):
-        for operation in cls:
-            if operation.value.name.lower() == name.lower():
-                return operation
-        else:
+        try:
+            return OPERATIONS_BY_NAME[name.lower()]
+        except KeyError:
             raise ValueError(name)
 
     @property
@@ -74,8 +79,35 @@ class Operation(Enum):
         Convert the operation's pattern into a regex matcher.
 
         """
-        parts = self.value.pattern.split(".")
-        return "[.]".join(
-            "(?P<{}>[^.]*)".format(part[1:-1])
-            for part in parts
-        )
+        return ENDPOINT_PATTERNS[self.value.pattern]
+
+    @property
+    def endpoint_regex(self):
+        """
+        The operation's (precompiled) endpoint pattern.
+
+        """
+        return ENDPOINT_REGEXES[self.value.pattern]
+
+
+def make_endpoint_pattern(pattern):
+    parts = pattern.split(".")
+    return "[.]".join(
+        "(?P<{}>[^.]*)".format(part[1:-1])
+        for part in parts
+    )
+
+
+# lookup tables; operations are resolved for every rule during discovery, swagger, and landing
+OPERATIONS_BY_NAME = {
+    operation.value.name.lower(): operation
+    for operation in Operation
+}
+ENDPOINT_PATTERNS = {
+    pattern: make_endpoint_pattern(pattern)
+    for pattern in (NODE_PATTERN, EDGE_PATTERN)
+}
+ENDPOINT_REGEXES = {
+    pattern: compile_regex(endpoint_pattern)
+    for pattern, endpoint_pattern in ENDPOINT_PATTERNS.items()
+}
@@ -1,9 +1,25 @@
+"""
+Request and startup profiling.
+
+Startup profiling reports the import and construction time of each factory that a package
+registers as a `microcosm.factories` entry point:
+
+    python -m microcosm_flask.profiling --name <service>
+
+"""
+from argparse import ArgumentParser
+from collections import namedtuple
+from operator import attrgetter
 from os import makedirs
 from os.path import exists, expanduser
+from time import perf_counter
 
 from werkzeug.contrib.profiler import ProfilerMiddleware
 
 
+FactoryProfile = namedtuple("FactoryProfile", ["name", "import_time", "construction_time", "error"])
+
+
 def default_profile_dir(name):
     return expanduser("~/.{name}/profile".format(name=name))
 
@@ -20,3 +36,84 @@ def enable_profiling(graph):
     )
 
     graph.app.logger.info("*** Profiling is ON, Will save profiling data to directory: {}".format(profile_dir))
+
+
+def iter_factory_entry_points(project_name):
+    from pkg_resources import iter_entry_points
+
+    for entry_point in iter_entry_points(group="microcosm.factories"):
+        if entry_point.dist.project_name == project_name:
+            yield entry_point
+
+
+def profile_startup(name, project_name="microcosm-flask", **kwargs):
+    """
+    Profile the import and construction of every factory registered by a package.
+
+    Times are incremental: modules imported by (and components constructed for) earlier
+    factories are not counted again, so this should be run in a fresh process.
+
+    :param name: the name of the object graph to create
+    :param project_name: the package whose factories should be profiled
+    :param kwargs: additional arguments to `create_object_graph`
+    :returns: a tuple of the graph creation time and a list of `FactoryProfile` (times in seconds)
+
+    """
+    from microcosm.api import create_object_graph
+
+    entry_points = sorted(iter_factory_entry_points(project_name), key=attrgetter("name"))
+
+    import_times = dict()
+    for entry_point in entry_points:
+        start_time = perf_counter()
+        entry_point.resolve()
+        import_times[entry_point.name] = perf_counter() - start_time
+
+    # includes microcosm's own entry point scan (and defaults resolution)
+    start_time = perf_counter()
+    graph = create_object_graph(name=name, **kwargs)
+    graph_time = perf_counter() - start_time
+
+    profiles = []
+    for entry_point in entry_points:
+        error = None
+        start_time = perf_counter()
+        try:
+            graph.use(entry_point.name)
+        except Exception as exception:
+            error = exception
+        profiles.append(FactoryProfile(
+            name=entry_point.name,
+            import_time=import_times[entry_point.name],
+            construction_time=perf_counter() - start_time,
+            error=error,
+        ))
+
+    return graph_time, profiles
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--name", default="example")
+    parser.add_argument("--project-name", default="microcosm-flask")
+    parser.add_argument("--testing", action="store_true", default=False)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    graph_time, profiles = profile_startup(args.name, project_name=args.project_name, testing=args.testing)
+
+    print("{:<28} {:>10} {:>10}".format("factory", "import ms", "create ms"))  # noqa
+    for profile in profiles:
+        print("{:<28} {:>10.1f} {:>10.1f}{}".format(  # noqa
+            profile.name,
+            profile.import_time * 1000,
+            profile.construction_time * 1000,
+            " ({})".format(profile.error) if profile.error else "",
+        ))
+    print("{:<28} {:>10} {:>10.1f}".format("(object graph)", "", graph_time * 1000))  # noqa
+
+
+if __name__ == "__main__":
+    main()
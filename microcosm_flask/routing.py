@@ -5,10 +5,82 @@ Intercepts Flask's normal route registration to inject conventions.
 
 """
 from distutils.util import strtobool
+from functools import wraps
+from logging import getLogger
 
+from flask import current_app, request
 from flask_cors import cross_origin
 from microcosm.api import defaults
-from microcosm_logging.decorators import context_logger
+from microcosm_flask.audit import RequestInfo, should_skip_logging
+from microcosm_flask.conventions.encoding import require_content_length
+from microcosm_flask.conventions.registry import get_max_content_length
+from microcosm_flask.errors import record_request_error
+from microcosm_logging.decorators import ContextLogger
+from microcosm_logging.timing import elapsed_time
+
+
+def fuse_route(graph, func, audit_options=None, logger_parent=None):
+    """
+    Apply per-request route features in a single wrapper.
+
+    Equivalent to (outermost first) auditing, opaque context initialization, and context
+    logging; the request context is computed once per request and shared between them.
+
+    CORS, basic auth, and route metrics are not fused: they remain the (inner) decorators
+    provided by their libraries, so that their behavior (and, for metrics, their names, tags,
+    and units) follows the installed versions. In particular, route metrics are timed
+    separately from the audit log.
+
+    :param audit_options: `AuditOptions` if requests should be audited
+    :param logger_parent: an object whose `logger` should be a context logger during requests
+
+    """
+    request_context = graph.request_context
+    opaque = graph.opaque
+    audit_logger = getLogger("audit")
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        context = request_context()
+
+        def get_context():
+            return context
+
+        request_info = None
+        if audit_options is not None:
+            request_info = RequestInfo(audit_options, func, get_context)
+            request_info.capture_request()
+
+        timing = dict()
+        try:
+            with opaque.initialize(get_context):
+                if logger_parent is not None:
+                    logger_parent.logger = ContextLogger(
+                        getattr(logger_parent, "logger", getLogger(logger_parent.__class__.__name__)),
+                        context,
+                    )
+                try:
+                    with elapsed_time(timing):
+                        response = func(*args, **kwargs)
+                finally:
+                    if logger_parent is not None:
+                        logger_parent.logger = logger_parent.logger.logger
+        except Exception as error:
+            record_request_error(error)
+            if request_info is not None:
+                request_info.capture_error(error)
+            raise
+        else:
+            if request_info is not None:
+                request_info.capture_response(response)
+            return response
+        finally:
+            if request_info is not None:
+                request_info.timing = timing
+                if not should_skip_logging(func):
+                    request_info.log(audit_logger)
+
+    return wrapper
 
 
 @defaults(
@@ -20,6 +92,7 @@ from microcosm_logging.decorators import context_logger
     enable_context_logger="true",
     enable_cors="true",
     enable_metrics="false",
+    max_content_length=None,
 )
 def configure_route_decorator(graph):
     """
@@ -28,6 +101,9 @@ def configure_route_decorator(graph):
     By default, enables CORS support, assuming that service APIs are not exposed
     directly to browsers except when using API browsing tools.
 
+    Request bodies larger than an endpoint's `max_content_length` (or the route default)
+    are refused before any request processing.
+
     Usage:
 
         @graph.route(ns.collection_path, Operation.Search, ns)
@@ -41,9 +117,21 @@ def configure_route_decorator(graph):
     enable_cors = strtobool(graph.config.route.enable_cors)
     enable_metrics = strtobool(graph.config.route.enable_metrics)
 
+    default_max_content_length = graph.config.route.max_content_length
+    if default_max_content_length is not None:
+        default_max_content_length = int(default_max_content_length)
+
     # routes depends on converters
     graph.use(*graph.config.route.converters)
 
+    @graph.flask.before_request
+    def limit_content_length():
+        view_func = current_app.view_functions.get(request.endpoint)
+        max_content_length = get_max_content_length(view_func)
+        if max_content_length is None:
+            max_content_length = default_max_content_length
+        require_content_length(max_content_length)
+
     def route(path, operation, ns):
         """
         :param path: a URI path, possibly derived from a property of the `ns`
@@ -60,16 +148,7 @@ def configure_route_decorator(graph):
             if enable_basic_auth or ns.enable_basic_auth:
                 func = graph.basic_auth.required(func)
 
-            if enable_context_logger and ns.controller is not None:
-                func = context_logger(
-                    graph.request_context,
-                    func,
-                    parent=ns.controller,
-                )
-
-            # set the opaque component data_func to look at the flask request context
-            func = graph.opaque.initialize(graph.request_context)(func)
-
+            # route metrics keep their own timing (see `fuse_route`)
             if enable_metrics or ns.enable_metrics:
                 from microcosm_flask.metrics import StatusCodeClassifier
                 tags = [f"endpoint:{endpoint}", "backend_type:microcosm_flask"]
@@ -80,9 +159,18 @@ def configure_route_decorator(graph):
                 )(func)
                 func = graph.metrics_timing("route", tags=tags)(func)
 
-            # keep audit decoration last (before registering the route) so that
-            # errors raised by other decorators are captured in the audit trail
-            if enable_audit:
+            # audit (outermost) so that errors raised by other features are captured in the audit trail,
+            # then the opaque context (from the flask request context) and context logging
+            audit_options = getattr(graph.audit, "options", None) if enable_audit else None
+            func = fuse_route(
+                graph,
+                func,
+                audit_options=audit_options,
+                logger_parent=ns.controller if enable_context_logger else None,
+            )
+
+            if enable_audit and audit_options is None:
+                # a custom audit decorator that does not expose its options
                 func = graph.audit(func)
 
             graph.app.route(
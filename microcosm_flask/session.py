@@ -2,8 +2,14 @@
 Support a user-defined per-request session.
 
 """
+from collections import deque
+from functools import partial
+from threading import Lock
+
 from flask import g
 
+from microcosm_flask.errors import get_request_error
+
 
 def register_session_factory(graph, key, session_factory):
     """
@@ -31,3 +37,193 @@ def register_session_factory(graph, key, session_factory):
         session = getattr(g, key, None)
         if session is not None and hasattr(session, "close"):
             session.close()
+
+
+class SessionPool:
+    """
+    A bounded pool of (user-defined) session objects.
+
+    Sessions are checked out for a request and returned (after being reset) on teardown.
+    Sessions that fail validation on checkout (or fail to reset on return) are discarded,
+    as are sessions returned after an error or to a full pool; checkouts never block.
+
+    """
+    def __init__(self, factory, reset_func, max_size=8, validate_func=None):
+        self.factory = factory
+        self.reset_func = reset_func
+        self.max_size = max_size
+        self.validate_func = validate_func
+        self.idle = deque()
+        self.lock = Lock()
+        self.counts = dict(
+            created=0,
+            reused=0,
+            discarded=0,
+            checked_out=0,
+        )
+
+    def checkout(self):
+        while True:
+            with self.lock:
+                session = self.idle.pop() if self.idle else None
+
+            if session is None:
+                session = self.factory()
+                self.count("created")
+                break
+            if self.validate_func is None or self.validate_func(session):
+                self.count("reused")
+                break
+            self.discard(session)
+
+        self.count("checked_out")
+        return session
+
+    def checkin(self, session, error=None):
+        """
+        Return a session to the pool.
+
+        :param error: the error (if any) raised while the session was checked out; sessions
+                      may be in an unknown state after an error and are discarded
+
+        """
+        self.count("checked_out", -1)
+
+        if error is not None:
+            self.discard(session)
+            return
+
+        try:
+            self.reset_func(session)
+        except Exception:
+            self.discard(session)
+            return
+
+        with self.lock:
+            if len(self.idle) < self.max_size:
+                self.idle.append(session)
+                return
+        self.discard(session)
+
+    def discard(self, session):
+        self.count("discarded")
+        if hasattr(session, "close"):
+            session.close()
+
+    def count(self, name, delta=1):
+        with self.lock:
+            self.counts[name] += delta
+
+    def stats(self):
+        """
+        Report pool metrics.
+
+        """
+        with self.lock:
+            return dict(self.counts, idle=len(self.idle))
+
+
+class LazySession:
+    """
+    A proxy that checks out a session on first use.
+
+    Attribute access and the context manager, truth, container, and iteration protocols
+    are forwarded to the session.
+
+    """
+    def __init__(self, checkout):
+        self._checkout = checkout
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = self._checkout()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            setattr(self.session, name, value)
+
+    def __enter__(self):
+        return self.session.__enter__()
+
+    def __exit__(self, *args):
+        return self.session.__exit__(*args)
+
+    def __bool__(self):
+        return bool(self.session)
+
+    def __len__(self):
+        return len(self.session)
+
+    def __iter__(self):
+        return iter(self.session)
+
+    def __contains__(self, item):
+        return item in self.session
+
+    def __getitem__(self, key):
+        return self.session[key]
+
+
+def register_pooled_session_factory(graph,
+                                    key,
+                                    session_factory,
+                                    reset_func,
+                                    max_size=8,
+                                    validate_func=None,
+                                    lazy=False,
+                                    enable_metrics=False):
+    """
+    Register a session creation function so that a session from a (per-process) pool
+    will be saved to `flask.g` on every request (and returned to the pool on teardown).
+
+    Pooled sessions are reset (using `reset_func`) rather than closed on teardown and are
+    validated (using `validate_func`, if any) when checked out. The reset function must
+    clear any per-request state (e.g. open transactions or credentials); sessions used by
+    requests that raised are closed rather than reset.
+
+    If `lazy`, `flask.g` holds a proxy that only checks out a session once it is used,
+    so that requests that do not use the session pay nothing.
+
+    If `enable_metrics`, the pool's `stats` are reported as gauges (via `graph.metrics`)
+    after every request that used a session.
+
+    :returns: the session pool
+
+    """
+    pool = SessionPool(
+        partial(session_factory, graph),
+        reset_func=reset_func,
+        max_size=max_size,
+        validate_func=validate_func,
+    )
+
+    if enable_metrics:
+        from microcosm_flask.metrics import record_session_pool_metrics
+
+    @graph.flask.before_request
+    def begin_session():
+        setattr(g, key, LazySession(pool.checkout) if lazy else pool.checkout())
+
+    @graph.flask.teardown_request
+    def end_session(error=None):
+        # NB: session will be none if there's an error raised in `before_request`
+        session = getattr(g, key, None)
+        if isinstance(session, LazySession):
+            session = session._session
+        if session is None:
+            return
+
+        # errors handled by error handlers are not passed to teardown
+        pool.checkin(session, error or get_request_error())
+        if enable_metrics:
+            record_session_pool_metrics(graph, key, pool.stats())
+
+    return pool
@@ -0,0 +1,69 @@
+"""
+Generate swagger definitions offline.
+
+Builds the swagger definition for every configured swagger namespace (version) and writes
+each to disk, for use as a pre-built artifact (see `swagger_convention.artifact_dir`) or to
+diff API changes between builds.
+
+Usage, alongside `microcosm_flask.runserver.main`:
+
+    from microcosm_flask.swagger.cli import main
+
+    main(graph)
+
+"""
+from argparse import ArgumentParser
+from json import dump
+from os import makedirs
+from os.path import exists
+
+from microcosm_flask.conventions.swagger import (
+    SwaggerConvention,
+    get_swagger_namespace,
+    swagger_artifact_path,
+)
+
+
+def iter_swagger_namespaces(graph):
+    for endpoint in sorted(graph.flask.view_functions.keys()):
+        ns = get_swagger_namespace(graph.flask.view_functions[endpoint])
+        if ns is not None:
+            yield ns
+
+
+def generate_swagger(graph, output_dir):
+    """
+    Write the swagger definition of every swagger namespace to the output directory.
+
+    :returns: the paths written
+
+    """
+    if not exists(output_dir):
+        makedirs(output_dir)
+
+    convention = SwaggerConvention(graph)
+    paths = []
+
+    with graph.flask.test_request_context():
+        for ns in iter_swagger_namespaces(graph):
+            path = swagger_artifact_path(output_dir, ns)
+            with open(path, "w") as outfile:
+                # sort keys so that definitions are stable (and diffable) between builds
+                dump(convention.build_swagger(ns), outfile, indent=2, sort_keys=True)
+                outfile.write("\n")
+            paths.append(path)
+
+    return paths
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument("--output-dir", default=".")
+    return parser.parse_args()
+
+
+def main(graph):
+    args = parse_args()
+
+    for path in generate_swagger(graph, args.output_dir):
+        print(path)  # noqa
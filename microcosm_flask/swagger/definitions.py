@@ -25,6 +25,7 @@ from werkzeug.routing import BuildError
 from microcosm_flask.conventions.registry import (
     get_qs_schema,
     get_request_schema,
+    get_response_formats,
     get_response_schema,
 )
 from microcosm_flask.errors import ErrorSchema, ErrorContextSchema, SubErrorSchema
@@ -37,10 +38,12 @@ from microcosm_flask.swagger.schema import build_parameter, iter_schemas
 logger = getLogger("microcosm_flask.swagger")
 
 
-def build_swagger(graph, ns, operations):
+def build_swagger(graph, ns, operations, validate=True):
     """
     Build out the top-level swagger definition.
 
+    :param validate: whether to validate the definition against the swagger schema
+
     """
     base_path = graph.build_route_path(ns.path, ns.prefix)
     schema = swagger.Swagger(
@@ -61,11 +64,12 @@ def build_swagger(graph, ns, operations):
     )
     add_paths(schema.paths, base_path, operations)
     add_definitions(schema.definitions, operations)
-    try:
-        schema.validate()
-    except Exception:
-        logger.exception("Swagger definition did not validate against swagger schema")
-        raise
+    if validate:
+        try:
+            schema.validate()
+        except Exception:
+            logger.exception("Swagger definition did not validate against swagger schema")
+            raise
 
     return schema
 
@@ -91,11 +95,12 @@ def add_definitions(definitions, operations):
     Add definitions to swagger.
 
     """
+    seen = set(definitions.keys())
     for definition_schema in iter_definitions(definitions, operations):
         if isinstance(definition_schema, str):
             continue
-        for name, schema in iter_schemas(definition_schema):
-            definitions.setdefault(name, swagger.Schema(schema))
+        for name, schema in iter_schemas(definition_schema, seen):
+            definitions[name] = swagger.Schema(schema)
 
 
 def iter_definitions(definitions, operations):
@@ -255,6 +260,10 @@ def add_responses(swagger_operation, operation, ns, func):
         swagger_operation.consumes = [
             "multipart/form-data"
         ]
+    elif operation == Operation.UploadChunk:
+        swagger_operation.consumes = [
+            "application/octet-stream"
+        ]
 
     # resource request
     request_resource = get_request_schema(func)
@@ -263,6 +272,14 @@ def add_responses(swagger_operation, operation, ns, func):
             swagger_operation.consumes = []
         swagger_operation.consumes.append(request_resource)
 
+    # response formats (other than the default)
+    response_formats = get_response_formats(func)
+    if response_formats:
+        swagger_operation.produces = [
+            response_format.content_type
+            for response_format in response_formats
+        ]
+
     # resources response
     response_resource = get_response_schema(func)
     if isinstance(response_resource, str):
@@ -4,6 +4,7 @@ Naming conventions for Swagger definitions.
 Intended to play nice with generated code (e.g. with Bravado)
 
 """
+from functools import lru_cache
 
 from inflection import camelize, pluralize
 
@@ -26,6 +27,7 @@ def operation_name(operation, ns):
         return verb
 
 
+@lru_cache(maxsize=1024)
 def type_name(name):
     """
     Convert an internal name into a swagger type name.
@@ -1,7 +1,11 @@
 """
 Generate JSON Schema for Marshmallow schemas.
 
+JSON schemas are built once per schema class (and field selection) and shared (up to a
+bounded number of recently used schemas); callers should not modify them.
+
 """
+from functools import lru_cache
 from logging import getLogger
 
 from marshmallow import fields
@@ -155,24 +159,35 @@ def resolve_numeric_string_field(field):
         )
 
 
+@lru_cache(maxsize=256)
+def default_for_field_type(field_cls):
+    """
+    Resolve the default parameter items for a field type.
+
+    :raises KeyError: if the type is not mapped
+
+    """
+    field_type, field_format = FIELD_MAPPINGS[field_cls]
+    if field_format:
+        return (
+            ("type", field_type),
+            ("format", field_format),
+        )
+    elif field_type:
+        return (
+            ("type", field_type),
+        )
+    else:
+        return ()
+
+
 def resolve_default_for_field(field):
     """
     Field defaults should be the fallback.
 
     """
     try:
-        field_type, field_format = FIELD_MAPPINGS[type(field)]
-        if field_format:
-            return dict(
-                type=field_type,
-                format=field_format,
-            )
-        elif field_type:
-            return dict(
-                type=field_type,
-            )
-        else:
-            return dict()
+        return dict(default_for_field_type(type(field)))
     except KeyError:
         logger.exception("No mapped swagger type for marshmallow field: {}".format(
             field,
@@ -215,11 +230,50 @@ def build_parameter(field):
     return parameter
 
 
+def schema_key(marshmallow_schema):
+    """
+    Key a marshmallow schema by its class and field selection.
+
+    """
+    return (
+        type(marshmallow_schema),
+        tuple(sorted(marshmallow_schema.only)) if marshmallow_schema.only else None,
+        tuple(sorted(marshmallow_schema.exclude)),
+    )
+
+
+class SchemaKey:
+    """
+    A marshmallow schema, hashed (and compared) by its `schema_key`.
+
+    """
+    def __init__(self, marshmallow_schema):
+        self.marshmallow_schema = marshmallow_schema
+        self.key = schema_key(marshmallow_schema)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, SchemaKey) and self.key == other.key
+
+
 def build_schema(marshmallow_schema):
     """
     Build JSON schema from a marshmallow schema.
 
+    Memoized; the result is shared and should not be modified.
+
     """
+    return build_keyed_schema(SchemaKey(marshmallow_schema))
+
+
+@lru_cache(maxsize=256)
+def build_keyed_schema(key):
+    return _build_schema(key.marshmallow_schema)
+
+
+def _build_schema(marshmallow_schema):
     fields = list(iter_fields(marshmallow_schema))
     required_fields = [
         field.dump_to or name
@@ -249,30 +303,31 @@ def iter_fields(marshmallow_schema):
         yield name, marshmallow_schema.fields[name]
 
 
-def iter_schemas(marshmallow_schema):
+def iter_schemas(marshmallow_schema, seen=None):
     """
     Build zero or more JSON schemas for a marshmallow schema.
 
+    Each (named) schema is generated at most once, which also terminates traversal of
+    self-referencing schemas; pass the same `seen` set to share this across calls.
+
     Generates: name, schema pairs.
 
     """
     if not marshmallow_schema:
         return
 
-    base_schema = build_schema(marshmallow_schema)
+    if seen is None:
+        seen = set()
+
     base_schema_name = type_name(name_for(marshmallow_schema))
-    yield base_schema_name, base_schema
+    if base_schema_name in seen:
+        return
+    seen.add(base_schema_name)
+
+    yield base_schema_name, build_schema(marshmallow_schema)
 
     for name, field in iter_fields(marshmallow_schema):
+        if isinstance(field, fields.List):
+            field = field.container
         if isinstance(field, fields.Nested):
-            nested_schema = build_schema(field.schema)
-            nested_schema_name = type_name(name_for(field.schema))
-            yield nested_schema_name, nested_schema
-            for subname, subfield in iter_schemas(field.schema):
-                yield subname, subfield
-        if isinstance(field, fields.List) and isinstance(field.container, fields.Nested):
-            nested_schema = build_schema(field.container.schema)
-            nested_schema_name = type_name(name_for(field.container.schema))
-            yield nested_schema_name, nested_schema
-            for subname, subfield in iter_schemas(field.container.schema):
-                yield subname, subfield
+            yield from iter_schemas(field.schema, seen)
@@ -3,11 +3,13 @@ CRUD convention tests.
 
 """
 from enum import Enum
+from json import dumps
 
 from hamcrest import assert_that, contains_inanyorder, equal_to, is_
 from marshmallow.fields import String
 from microcosm.api import create_object_graph
 
+from microcosm_flask.conventions.base import EndpointDefinition
 from microcosm_flask.conventions.crud import configure_crud
 from microcosm_flask.fields import EnumField, QueryStringList
 from microcosm_flask.namespaces import Namespace
@@ -60,7 +62,12 @@ def add_request_id(headers, response_data):
 PERSON_MAPPINGS = {
     Operation.Create: (person_create, NewPersonSchema(), PersonSchema(), add_request_id),
     Operation.Delete: (person_delete,),
-    Operation.UpdateBatch: (person_update_batch, NewPersonBatchSchema(), PersonBatchSchema()),
+    Operation.UpdateBatch: EndpointDefinition(
+        func=person_update_batch,
+        request_schema=NewPersonBatchSchema(),
+        response_schema=PersonBatchSchema(),
+        request_streaming=True,
+    ),
     Operation.Replace: (person_replace, NewPersonSchema(), PersonSchema()),
     Operation.Retrieve: (person_retrieve, PersonLookupSchema(), PersonSchema()),
     Operation.Search: (person_search, OffsetLimitPageSchema(), PersonSchema()),
@@ -262,6 +269,44 @@ class TestCRUD:
             }],
         })
 
+    def test_update_batch_streaming(self):
+        request_data = "\n".join(
+            dumps(item)
+            for item in [
+                dict(firstName="Bob", lastName="Jones"),
+                dict(firstName="Charlie", lastName="Jones"),
+            ]
+        )
+        response = self.client.patch("/api/person", data=request_data, content_type="application/x-ndjson")
+        self.assert_response(response, 200)
+        assert_that(
+            [(item["firstName"], item["lastName"]) for item in response.json["items"]],
+            is_(equal_to([("Bob", "Jones"), ("Charlie", "Jones")])),
+        )
+
+    def test_update_batch_streaming_malformed(self):
+        request_data = "\n".join([
+            dumps(dict(firstName="Bob", lastName="Jones")),
+            # blank lines are skipped (and not counted)
+            "",
+            dumps(dict(firstName="Charlie")),
+        ])
+        response = self.client.patch("/api/person", data=request_data, content_type="application/x-ndjson")
+        self.assert_response(response, 422, {
+            "code": 422,
+            "message": "Validation error",
+            "retryable": False,
+            "context": {
+                "errors": [{
+                    "message": "Could not validate field: items.1.lastName",
+                    "field": "items.1.lastName",
+                    "reasons": [
+                        "Missing data for required field.",
+                    ],
+                }]
+            }
+        })
+
     def test_retrieve(self):
         uri = "/api/person/{}".format(PERSON_ID_1)
         response = self.client.get(uri)
@@ -1,8 +1,38 @@
-from hamcrest import assert_that, equal_to, is_
+from io import BytesIO
+from json import dumps, loads
+from unittest.mock import patch
+
+from flask import request
+from hamcrest import assert_that, calling, equal_to, has_entries, is_, raises
+from marshmallow import Schema, fields, pre_load
 from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+from werkzeug.exceptions import RequestEntityTooLarge
 
-from microcosm_flask.conventions.encoding import find_response_format
+from microcosm_flask.conventions.base import EndpointDefinition
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.conventions.registry import qs
+from microcosm_flask.conventions.encoding import (
+    find_response_format,
+    is_trivial_schema,
+    load_query_string_data,
+    load_request_data,
+    require_content_length,
+)
 from microcosm_flask.enums import ResponseFormats
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+class FooSchema(Schema):
+    foo = fields.String()
+
+
+class PreLoadSchema(Schema):
+
+    @pre_load
+    def check(self, data):
+        return data
 
 
 class TestEncoding:
@@ -41,3 +71,88 @@ class TestEncoding:
                 find_response_format([ResponseFormats.CSV, ResponseFormats.JSON]),
                 equal_to(ResponseFormats.CSV),
             )
+
+    def test_is_trivial_schema(self):
+        assert_that(is_trivial_schema(Schema()), is_(equal_to(True)))
+        assert_that(is_trivial_schema(FooSchema()), is_(equal_to(False)))
+        assert_that(is_trivial_schema(PreLoadSchema()), is_(equal_to(False)))
+
+    def test_is_trivial_schema_without_processors(self):
+        # schemas whose processors are unknown (e.g. after a marshmallow upgrade) are loaded
+        class UnknownSchema:
+            fields = dict()
+
+        assert_that(is_trivial_schema(UnknownSchema()), is_(equal_to(False)))
+
+    def test_is_trivial_schema_registered(self):
+        schema = Schema()
+        qs(schema)
+
+        with patch.object(Schema, "_has_processors", new=True):
+            # computed when registered
+            assert_that(is_trivial_schema(schema), is_(equal_to(True)))
+
+    def test_load_trivial_schema(self):
+        with self.graph.app.test_request_context(query_string=dict(foo="bar"), data="not json"):
+            assert_that(load_query_string_data(Schema()), is_(equal_to(dict())))
+            assert_that(load_request_data(Schema()), is_(equal_to(dict())))
+
+    def test_load_request_data_too_large(self):
+        self.graph.app.config["MAX_CONTENT_LENGTH"] = 8
+
+        with self.graph.app.test_request_context(data='{"foo": "bar"}'):
+            assert_that(calling(load_request_data).with_args(FooSchema()), raises(RequestEntityTooLarge))
+
+        with self.graph.app.test_request_context(data='{"a": 1}'):
+            assert_that(load_request_data(FooSchema()), is_(equal_to(dict())))
+
+    def test_require_content_length_streaming(self):
+        with self.graph.app.test_request_context(
+            input_stream=BytesIO(b'{"foo": "bar"}'),
+            environ_base={"wsgi.input_terminated": True},
+        ):
+            # e.g. chunked transfer encoding
+            request.environ.pop("CONTENT_LENGTH", None)
+            require_content_length(8)
+            assert_that(calling(load_request_data).with_args(FooSchema()), raises(RequestEntityTooLarge))
+
+
+class TestMaxContentLength:
+
+    def setup(self):
+        loader = load_from_dict(route=dict(max_content_length=16))
+        self.graph = create_object_graph(name="example", testing=True, loader=loader)
+
+        def create(**kwargs):
+            return kwargs
+
+        def update(foo_id, **kwargs):
+            return kwargs
+
+        configure_crud(self.graph, Namespace(subject="foo"), {
+            Operation.Create: (create, FooSchema(), FooSchema()),
+            Operation.Update: EndpointDefinition(
+                func=update,
+                request_schema=FooSchema(),
+                response_schema=FooSchema(),
+                max_content_length=64,
+            ),
+        })
+        self.client = self.graph.flask.test_client()
+
+    def test_default_limit(self):
+        response = self.client.post("/api/foo", data=dumps(dict(foo="bar")))
+        assert_that(response.status_code, is_(equal_to(201)))
+
+        response = self.client.post("/api/foo", data=dumps(dict(foo="bar" * 8)))
+        assert_that(response.status_code, is_(equal_to(413)))
+        assert_that(loads(response.get_data().decode("utf-8")), has_entries(code=413))
+
+    def test_endpoint_limit(self):
+        uri = "/api/foo/{}".format("b0d0a0c0-0000-4000-8000-000000000000")
+
+        response = self.client.patch(uri, data=dumps(dict(foo="bar" * 8)))
+        assert_that(response.status_code, is_(equal_to(200)))
+
+        response = self.client.patch(uri, data=dumps(dict(foo="bar" * 32)))
+        assert_that(response.status_code, is_(equal_to(413)))
@@ -0,0 +1,171 @@
+"""
+Resource-versioned ETag tests.
+
+"""
+from json import dumps
+from unittest.mock import patch
+from uuid import uuid4
+
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_key,
+    is_,
+    is_not,
+    none,
+)
+from marshmallow import Schema, fields
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.conventions.etags import ETagCache
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+class Widget:
+    def __init__(self, id, name, version):
+        self.id = id
+        self.name = name
+        self.version = version
+
+
+class WidgetSchema(Schema):
+    id = fields.UUID()
+    name = fields.String()
+
+
+class UpdateWidgetSchema(Schema):
+    name = fields.String()
+
+
+class UpdateWidgetBatchSchema(Schema):
+    items = fields.List(fields.Nested(UpdateWidgetSchema))
+
+
+class WidgetBatchSchema(Schema):
+    items = fields.List(fields.Nested(WidgetSchema))
+
+
+WIDGET_ID = uuid4()
+
+
+class TestVersionedETags:
+
+    def setup(self):
+        loader = load_from_dict(flask=dict(etag_versioned="true", etag_cache_size=8))
+        self.graph = create_object_graph(name="example", testing=True, loader=loader)
+        self.widget = Widget(WIDGET_ID, "foo", 1)
+        self.retrieved = 0
+
+        def retrieve(widget_id):
+            self.retrieved += 1
+            return self.widget
+
+        def update(widget_id, name):
+            self.widget = Widget(widget_id, name, self.widget.version + 1)
+            return self.widget
+
+        def update_batch(items):
+            self.widget = Widget(WIDGET_ID, items[0]["name"], self.widget.version + 1)
+            return dict(items=[self.widget])
+
+        configure_crud(self.graph, Namespace(subject=Widget), {
+            Operation.Retrieve: (retrieve, WidgetSchema()),
+            Operation.Update: (update, UpdateWidgetSchema(), WidgetSchema()),
+            Operation.UpdateBatch: (update_batch, UpdateWidgetBatchSchema(), WidgetBatchSchema()),
+        })
+        self.client = self.graph.flask.test_client()
+        self.uri = "/api/widget/{}".format(WIDGET_ID)
+
+    def test_versioned_etag(self):
+        with patch("microcosm_flask.formatting.base.response_view") as mocked:
+            response = self.client.get(self.uri)
+
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(response.headers, has_key("ETag"))
+        # the body was not hashed
+        assert_that(mocked.called, is_(equal_to(False)))
+
+    def test_not_modified(self):
+        etag = self.client.get(self.uri).headers["ETag"]
+
+        response = self.client.get(self.uri, headers={"If-None-Match": etag})
+
+        assert_that(response.status_code, is_(equal_to(304)))
+        assert_that(response.headers["ETag"], is_(equal_to(etag)))
+        # the resource was not loaded again
+        assert_that(self.retrieved, is_(equal_to(1)))
+
+    def test_modified(self):
+        etag = self.client.get(self.uri).headers["ETag"]
+
+        self.client.patch(self.uri, data=dumps(dict(name="bar")))
+        response = self.client.get(self.uri, headers={"If-None-Match": etag})
+
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(response.headers["ETag"], is_not(equal_to(etag)))
+        assert_that(self.retrieved, is_(equal_to(2)))
+
+    def test_modified_by_batch(self):
+        etag = self.client.get(self.uri).headers["ETag"]
+
+        self.client.patch("/api/widget", data=dumps(dict(items=[dict(name="bar")])))
+        response = self.client.get(self.uri, headers={"If-None-Match": etag})
+
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(response.headers["ETag"], is_not(equal_to(etag)))
+        assert_that(self.retrieved, is_(equal_to(2)))
+
+    def test_not_modified_without_cache(self):
+        self.graph.app.config["ETAG_CACHE_SIZE"] = 0
+        etag = self.client.get(self.uri).headers["ETag"]
+
+        response = self.client.get(self.uri, headers={"If-None-Match": etag})
+
+        assert_that(response.status_code, is_(equal_to(304)))
+        assert_that(self.retrieved, is_(equal_to(2)))
+
+    def test_cache_expires_by_default(self):
+        assert_that(self.graph.app.config["ETAG_CACHE_TTL"], is_(equal_to(5.0)))
+
+    def test_cache_disabled_without_ttl(self):
+        self.graph.app.config["ETAG_CACHE_TTL"] = 0
+        etag = self.client.get(self.uri).headers["ETag"]
+
+        response = self.client.get(self.uri, headers={"If-None-Match": etag})
+
+        assert_that(response.status_code, is_(equal_to(304)))
+        assert_that(self.retrieved, is_(equal_to(2)))
+
+
+def test_etag_cache_eviction():
+    cache = ETagCache(maxsize=2, ttl=60)
+    cache.set("foo", 1)
+    cache.set("bar", 2)
+    cache.get("foo")
+    cache.set("baz", 3)
+
+    assert_that(cache.get("foo"), is_(equal_to(1)))
+    assert_that(cache.get("bar"), is_(none()))
+    assert_that(cache.get("baz"), is_(equal_to(3)))
+
+
+def test_etag_cache_ttl():
+    cache = ETagCache(maxsize=2, ttl=0)
+    cache.set("foo", 1)
+
+    with patch("microcosm_flask.conventions.etags.monotonic", return_value=float("inf")):
+        assert_that(cache.get("foo"), is_(none()))
+
+
+def test_etag_cache_invalidate_endpoint():
+    cache = ETagCache(maxsize=4, ttl=60)
+    cache.set(("widget.retrieve.v1", (("widget_id", 1),)), 1)
+    cache.set(("widget.retrieve.v1", (("widget_id", 2),)), 1)
+    cache.set(("gadget.retrieve.v1", (("gadget_id", 1),)), 1)
+
+    cache.invalidate_endpoint("widget.retrieve.v1")
+
+    assert_that(len(cache), is_(equal_to(1)))
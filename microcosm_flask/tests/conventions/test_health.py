@@ -3,16 +3,35 @@ Health check convention tests.
 
 """
 from json import loads
+from threading import Event
+from time import sleep
 
 from hamcrest import (
     assert_that,
     equal_to,
+    greater_than_or_equal_to,
     is_,
+    is_not,
+    none,
+    same_instance,
 )
 
 from microcosm.api import create_object_graph
 from microcosm.loaders import load_from_dict
 
+from microcosm_flask.conventions.health import HealthSnapshot, health_check
+
+
+def load_health(response):
+    """
+    Load a health response, removing (variable) check latencies.
+
+    """
+    data = loads(response.get_data().decode("utf-8"))
+    for check in data.get("checks", {}).values():
+        assert_that(check.pop("latency_ms"), is_(greater_than_or_equal_to(0)))
+    return data
+
 
 def test_health_check():
     """
@@ -31,7 +50,7 @@ def test_health_check():
 
     response = client.get("/api/health")
     assert_that(response.status_code, is_(equal_to(200)))
-    data = loads(response.get_data().decode("utf-8"))
+    data = load_health(response)
     assert_that(data, is_(equal_to({
         "name": "example",
         "ok": True,
@@ -46,7 +65,7 @@ def test_health_check_with_build_info():
 
     response = client.get("/api/health")
     assert_that(response.status_code, is_(equal_to(200)))
-    data = loads(response.get_data().decode("utf-8"))
+    data = load_health(response)
     assert_that(data, is_(equal_to(dict(
         name="example",
         ok=True,
@@ -82,7 +101,7 @@ def test_health_check_custom_check():
 
     response = client.get("/api/health")
     assert_that(response.status_code, is_(equal_to(200)))
-    data = loads(response.get_data().decode("utf-8"))
+    data = load_health(response)
     assert_that(data, is_(equal_to({
         "name": "example",
         "ok": True,
@@ -117,7 +136,7 @@ def test_health_check_custom_check_failed():
 
     response = client.get("/api/health")
     assert_that(response.status_code, is_(equal_to(503)))
-    data = loads(response.get_data().decode("utf-8"))
+    data = load_health(response)
     assert_that(data, is_(equal_to({
         "name": "example",
         "ok": False,
@@ -128,3 +147,212 @@ def test_health_check_custom_check_failed():
             },
         },
     })))
+
+
+def test_health_check_timeout():
+    """
+    Should fail checks that exceed their timeout without waiting for them.
+
+    """
+    loader = load_from_dict(
+        health_convention=dict(
+            include_build_info="false",
+        ),
+    )
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    graph.use("health_convention")
+
+    client = graph.flask.test_client()
+    event = Event()
+
+    @health_check(timeout=0.01)
+    def slow(graph):
+        event.wait()
+
+    graph.health_convention.checks["foo"] = slow
+    graph.health_convention.checks["bar"] = lambda graph: "hi"
+
+    try:
+        response = client.get("/api/health")
+    finally:
+        event.set()
+
+    assert_that(response.status_code, is_(equal_to(503)))
+    data = load_health(response)
+    assert_that(data, is_(equal_to({
+        "name": "example",
+        "ok": False,
+        "checks": {
+            "bar": {
+                "message": "hi",
+                "ok": True,
+            },
+            "foo": {
+                "message": "Timed out after 0.01s",
+                "ok": False,
+            },
+        },
+    })))
+
+
+def test_health_check_ttl():
+    """
+    Should reuse check results within their TTL.
+
+    """
+    loader = load_from_dict(
+        health_convention=dict(
+            include_build_info="false",
+        ),
+    )
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    graph.use("health_convention")
+
+    client = graph.flask.test_client()
+    calls = []
+
+    @health_check(ttl=60)
+    def counted(graph):
+        calls.append(graph)
+        return "hi"
+
+    graph.health_convention.checks["foo"] = counted
+
+    for _ in range(3):
+        response = client.get("/api/health")
+        assert_that(response.status_code, is_(equal_to(200)))
+
+    assert_that(len(calls), is_(equal_to(1)))
+
+
+def test_liveness():
+    """
+    Liveness does not evaluate checks.
+
+    """
+    graph = create_object_graph(name="example", testing=True)
+    graph.use("health_convention")
+
+    client = graph.flask.test_client()
+
+    def fail(graph):
+        raise Exception("failure!")
+
+    graph.health_convention.checks["foo"] = fail
+
+    response = client.get("/api/health/live")
+    assert_that(response.status_code, is_(equal_to(200)))
+    data = loads(response.get_data().decode("utf-8"))
+    assert_that(data, is_(equal_to({
+        "name": "example",
+        "ok": True,
+    })))
+
+
+def test_health_check_background():
+    """
+    Should serve the latest snapshot, failing only after consecutive failures.
+
+    """
+    loader = load_from_dict(
+        health_convention=dict(
+            include_build_info="false",
+            failure_threshold=2,
+        ),
+    )
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    graph.use("health_convention")
+
+    client = graph.flask.test_client()
+    health = graph.health_convention
+    calls = []
+
+    def fail(graph):
+        calls.append(graph)
+        raise Exception("failure!")
+
+    try:
+        health.checks["foo"] = fail
+
+        health.refresh()
+        response = client.get("/api/health")
+        assert_that(response.status_code, is_(equal_to(200)))
+
+        health.refresh()
+        response = client.get("/api/health")
+        assert_that(response.status_code, is_(equal_to(503)))
+        data = load_health(response)
+        assert_that(data, is_(equal_to({
+            "name": "example",
+            "ok": False,
+            "checks": {
+                "foo": {
+                    "message": "failure!",
+                    "ok": False,
+                },
+            },
+        })))
+
+        # probes do not evaluate checks
+        assert_that(len(calls), is_(equal_to(2)))
+    finally:
+        health.stop()
+
+
+def test_health_check_background_thread():
+    loader = load_from_dict(
+        health_convention=dict(
+            include_build_info="false",
+            refresh_interval=60,
+        ),
+    )
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    graph.use("health_convention")
+
+    health = graph.health_convention
+    # the thread starts on first use
+    assert_that(health.thread, is_(none()))
+
+    client = graph.flask.test_client()
+    try:
+        response = client.get("/api/health")
+        assert_that(response.status_code, is_(equal_to(200)))
+
+        for _ in range(100):
+            if health.snapshot is not None:
+                break
+            sleep(0.01)
+        assert_that(health.snapshot.ok, is_(equal_to(True)))
+    finally:
+        health.stop()
+    assert_that(health.thread, is_(none()))
+
+
+def test_health_check_background_thread_after_fork():
+    """
+    Should restart the background thread (and discard inherited state) in a forked process.
+
+    """
+    loader = load_from_dict(
+        health_convention=dict(
+            include_build_info="false",
+            refresh_interval=60,
+        ),
+    )
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    graph.use("health_convention")
+
+    health = graph.health_convention
+    try:
+        health.current_snapshot()
+        parent_thread, parent_stopped = health.thread, health.stopped
+
+        # simulate a fork: the parent's thread and snapshot are not valid in the child
+        health.pid = None
+        snapshot = health.snapshot = HealthSnapshot(ok=False, body=b"")
+
+        assert_that(health.current_snapshot(), is_not(same_instance(snapshot)))
+        assert_that(health.thread, is_not(same_instance(parent_thread)))
+    finally:
+        parent_stopped.set()
+        health.stop()
@@ -4,12 +4,16 @@ Landing convention tests.
 """
 from hamcrest import (
     assert_that,
+    contains_string,
     equal_to,
     is_,
+    none,
 )
 
 from microcosm.api import create_object_graph
 
+from microcosm_flask.conventions.landing import read_package_metadata
+
 
 def test_landing():
     """
@@ -23,3 +27,27 @@ def test_landing():
 
     response = client.get("/")
     assert_that(response.status_code, is_(equal_to(200)))
+
+
+def test_landing_cached():
+    """
+    Landing pages are cached and health is not evaluated on every hit.
+
+    """
+    graph = create_object_graph(name="example", testing=True)
+    graph.use("landing_convention")
+
+    client = graph.flask.test_client()
+    calls = []
+    graph.health_convention.checks["foo"] = lambda graph: calls.append(graph)
+
+    first = client.get("/")
+    second = client.get("/")
+
+    assert_that(second.data, is_(equal_to(first.data)))
+    assert_that(len(calls), is_(equal_to(1)))
+
+
+def test_read_package_metadata():
+    assert_that(read_package_metadata("microcosm-flask"), contains_string("Name: microcosm-flask"))
+    assert_that(read_package_metadata("no-such-package"), is_(none()))
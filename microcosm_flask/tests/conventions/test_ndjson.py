@@ -0,0 +1,145 @@
+"""
+NDJSON convention tests.
+
+"""
+from json import loads
+
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_key,
+    is_,
+    is_not,
+    starts_with,
+)
+from microcosm.api import create_object_graph
+
+from microcosm_flask.conventions.base import EndpointDefinition
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.conventions.swagger import configure_swagger
+from microcosm_flask.enums import ResponseFormats
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+from microcosm_flask.paging import OffsetLimitPageSchema
+from microcosm_flask.tests.conventions.fixtures import (
+    PERSON_ID_1,
+    Person,
+    PersonSchema,
+    person_retrieve,
+    person_search,
+)
+
+
+def person_search_all(offset, limit):
+    items, count = person_search(offset, limit)
+    return iter(items * 3), count * 3
+
+
+PERSON_MAPPINGS = {
+    Operation.Retrieve: EndpointDefinition(
+        func=person_retrieve,
+        response_schema=PersonSchema(),
+        response_formats=[ResponseFormats.JSON, ResponseFormats.NDJSON],
+    ),
+    Operation.Search: EndpointDefinition(
+        func=person_search_all,
+        request_schema=OffsetLimitPageSchema(),
+        response_schema=PersonSchema(),
+        response_formats=[ResponseFormats.JSON, ResponseFormats.NDJSON],
+    ),
+}
+
+
+class TestNDJSON:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        person_ns = Namespace(subject=Person)
+        configure_crud(self.graph, person_ns, PERSON_MAPPINGS)
+        configure_swagger(self.graph)
+        self.client = self.graph.flask.test_client()
+
+    def assert_ndjson_response(self, response, status_code, expected_items):
+        assert_that(response.status_code, is_(equal_to(status_code)))
+        assert_that(response.headers["Content-Type"], starts_with("application/x-ndjson"))
+        assert_that(response.headers, is_not(has_key("ETag")))
+
+        items = [
+            loads(line)
+            for line in response.data.decode("utf-8").splitlines()
+        ]
+        assert_that(items, is_(equal_to(expected_items)))
+
+    def test_search(self):
+        response = self.client.get(
+            "/api/person",
+            headers={"Accept": "application/x-ndjson"},
+        )
+        item = {
+            "id": str(PERSON_ID_1),
+            "firstName": "Alice",
+            "lastName": "Smith",
+            "_links": {
+                "self": {
+                    "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+                },
+            },
+        }
+        self.assert_ndjson_response(response, 200, [item, item, item])
+        assert_that(response.headers["X-Total-Count"], is_(equal_to("3")))
+
+    def test_search_json(self):
+        response = self.client.get("/api/person")
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(response.json["count"], is_(equal_to(3)))
+
+    def test_search_skip_null(self):
+        graph = create_object_graph(name="example", testing=True)
+        configure_crud(graph, Namespace(subject=Person), {
+            Operation.Retrieve: PERSON_MAPPINGS[Operation.Retrieve],
+            Operation.Search: EndpointDefinition(
+                func=lambda offset, limit: ([Person(PERSON_ID_1, "Alice", None)], 1),
+                request_schema=OffsetLimitPageSchema(),
+                response_schema=PersonSchema(),
+                response_formats=[ResponseFormats.NDJSON],
+            ),
+        })
+        client = graph.flask.test_client()
+
+        response = client.get(
+            "/api/person",
+            headers={"Accept": "application/x-ndjson", "X-Response-Skip-Null": "true"},
+        )
+        self.assert_ndjson_response(response, 200, [{
+            "id": str(PERSON_ID_1),
+            "firstName": "Alice",
+            "_links": {
+                "self": {
+                    "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+                },
+            },
+        }])
+
+    def test_retrieve(self):
+        response = self.client.get(
+            "/api/person/{}".format(PERSON_ID_1),
+            headers={"Accept": "application/x-ndjson"},
+        )
+        self.assert_ndjson_response(response, 200, [{
+            "id": str(PERSON_ID_1),
+            "firstName": "Alice",
+            "lastName": "Smith",
+            "_links": {
+                "self": {
+                    "href": "http://localhost/api/person/{}".format(PERSON_ID_1),
+                },
+            },
+        }])
+
+    def test_swagger(self):
+        response = self.client.get("/api/swagger")
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(
+            response.json["paths"]["/person"]["get"]["produces"],
+            is_(equal_to(["application/json", "application/x-ndjson"])),
+        )
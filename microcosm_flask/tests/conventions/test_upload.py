@@ -2,30 +2,47 @@
 Alias convention tests.
 
 """
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from hashlib import md5, sha256
 from io import BytesIO
+from tempfile import mkdtemp
+from threading import Event, Thread, current_thread
+from unittest.mock import patch
 from uuid import uuid4
 
+from flask import request
 from hamcrest import (
     all_of,
     anything,
     assert_that,
     contains,
+    contains_inanyorder,
     equal_to,
     has_entry,
     has_entries,
     has_item,
     has_key,
+    has_length,
+    instance_of,
     is_,
     is_not,
 )
 from json import loads
 from marshmallow import fields, Schema
 from microcosm.api import create_object_graph
+from werkzeug.exceptions import Conflict
 
 from microcosm_flask.namespaces import Namespace
 from microcosm_flask.conventions.base import EndpointDefinition
 from microcosm_flask.conventions.swagger import configure_swagger
-from microcosm_flask.conventions.upload import configure_upload
+from microcosm_flask.conventions.upload import (
+    LocalChunkStorage,
+    UploadMode,
+    configure_upload,
+    enter_contexts,
+    per_file_upload,
+)
 from microcosm_flask.operations import Operation
 from microcosm_flask.swagger.definitions import build_path
 from microcosm_flask.tests.conventions.fixtures import Person
@@ -218,3 +235,362 @@ class TestUpload:
                 extra="special",
             ),
         ))
+
+
+class TestStreamingUpload:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.calls = []
+
+        def upload(files, extra):
+            self.calls.extend(
+                (name, fileobj.read(), filename)
+                for name, fileobj, filename in files
+            )
+
+        for upload_mode in (UploadMode.STREAM, UploadMode.SPOOLED):
+            configure_upload(
+                self.graph,
+                Namespace(subject="file", version=upload_mode.value),
+                {
+                    Operation.Upload: EndpointDefinition(
+                        func=upload,
+                        request_schema=FileExtraSchema(),
+                    ),
+                },
+                upload_mode=upload_mode,
+                max_file_size=16,
+            )
+
+        self.client = self.graph.flask.test_client()
+
+    def test_upload(self):
+        for upload_mode in (UploadMode.STREAM, UploadMode.SPOOLED):
+            response = self.client.post(
+                "/api/{}/file".format(upload_mode.value),
+                data=dict(
+                    file=(BytesIO(b"Hello World\n"), "hello.txt"),
+                ),
+            )
+            assert_that(response.status_code, is_(equal_to(204)))
+
+        assert_that(self.calls, contains(
+            ("file", b"Hello World\n", "hello.txt"),
+            ("file", b"Hello World\n", "hello.txt"),
+        ))
+
+    def test_upload_too_large(self):
+        response = self.client.post(
+            "/api/stream/file",
+            data=dict(
+                file=(BytesIO(b"Hello World\n" * 2), "hello.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(413)))
+        assert_that(self.calls, contains())
+
+    def test_upload_already_parsed(self):
+        @self.graph.flask.before_request
+        def parse_form():
+            request.form
+
+        response = self.client.post(
+            "/api/stream/file",
+            data=dict(
+                file=(BytesIO(b"Hello World\n" * 2), "hello.txt"),
+            ),
+        )
+        # the file size limit is not silently skipped
+        assert_that(response.status_code, is_(equal_to(500)))
+        assert_that(self.calls, contains())
+
+
+class FileItemsSchema(Schema):
+    items = fields.List(fields.Nested(FileResponseSchema))
+
+
+class TestParallelUpload:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.calls = []
+        self.threads = set()
+
+        def upload(files, extra):
+            self.calls.extend(
+                (name, open(filepath).read(), filename)
+                for name, filepath, filename in files
+            )
+
+        @per_file_upload
+        def upload_for_person(files, extra, person_id):
+            self.threads.add(current_thread().name)
+            assert_that(files, has_length(1))
+            return dict(id=person_id)
+
+        configure_upload(
+            self.graph,
+            Namespace(subject="file"),
+            {
+                Operation.Upload: EndpointDefinition(
+                    func=upload,
+                    request_schema=FileExtraSchema(),
+                ),
+            },
+            max_workers=2,
+        )
+        configure_upload(
+            self.graph,
+            Namespace(subject=Person, object_="file"),
+            {
+                Operation.UploadFor: EndpointDefinition(
+                    func=upload_for_person,
+                    request_schema=FileExtraSchema(),
+                    response_schema=FileItemsSchema(),
+                ),
+            },
+            max_workers=2,
+        )
+
+        self.client = self.graph.flask.test_client()
+
+    def test_upload(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                first=(BytesIO(b"Hello\n"), "hello.txt"),
+                second=(BytesIO(b"World\n"), "world.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(204)))
+        assert_that(self.calls, contains_inanyorder(
+            ("first", "Hello\n", "hello.txt"),
+            ("second", "World\n", "world.txt"),
+        ))
+
+    def test_upload_per_file(self):
+        person_id = uuid4()
+        response = self.client.post(
+            "/api/person/{}/file".format(person_id),
+            data=dict(
+                first=(BytesIO(b"Hello\n"), "hello.txt"),
+                second=(BytesIO(b"World\n"), "world.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(200)))
+        response_data = loads(response.get_data().decode("utf-8"))
+        assert_that(response_data, is_(equal_to(dict(
+            items=[
+                dict(id=str(person_id)),
+                dict(id=str(person_id)),
+            ],
+        ))))
+        assert_that(self.threads, is_not(has_item(current_thread().name)))
+
+    def test_enter_contexts_in_request_context(self):
+        @contextmanager
+        def request_path():
+            yield request.path
+
+        with self.graph.flask.test_request_context("/api/file"):
+            with ExitStack() as stack, ThreadPoolExecutor(max_workers=2) as executor:
+                paths = enter_contexts(stack, [request_path(), request_path()], executor)
+
+        assert_that(paths, contains("/api/file", "/api/file"))
+
+
+class TestHashedUpload:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.calls = []
+        self.known_digests = {sha256(b"World\n").hexdigest()}
+
+        def upload(files, extra):
+            self.calls.extend(
+                (name, filepath and open(filepath).read(), filename, digest)
+                for name, filepath, filename, digest in files
+            )
+
+        configure_upload(
+            self.graph,
+            Namespace(subject="file"),
+            {
+                Operation.Upload: EndpointDefinition(
+                    func=upload,
+                    request_schema=FileExtraSchema(),
+                ),
+            },
+            hash_algorithm="sha256",
+            dedup_func=self.known_digests.__contains__,
+        )
+
+        self.client = self.graph.flask.test_client()
+
+    def test_upload(self):
+        response = self.client.post(
+            "/api/file",
+            data=dict(
+                first=(BytesIO(b"Hello\n"), "hello.txt"),
+                second=(BytesIO(b"World\n"), "world.txt"),
+            ),
+        )
+        assert_that(response.status_code, is_(equal_to(204)))
+        assert_that(self.calls, contains_inanyorder(
+            ("first", "Hello\n", "hello.txt", sha256(b"Hello\n").hexdigest()),
+            ("second", None, "world.txt", sha256(b"World\n").hexdigest()),
+        ))
+
+
+class TestChunkedUpload:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.calls = []
+
+        def upload(files, extra):
+            self.calls.extend(
+                (name, open(filepath, "rb").read(), filename, extra)
+                for name, filepath, filename in files
+            )
+            return dict(id=uuid4())
+
+        configure_upload(
+            self.graph,
+            Namespace(subject="file"),
+            {
+                Operation.FinalizeUpload: EndpointDefinition(
+                    func=upload,
+                    request_schema=FileExtraSchema(),
+                    response_schema=FileResponseSchema(),
+                ),
+            },
+            max_file_size=16,
+            chunk_storage=LocalChunkStorage(mkdtemp()),
+        )
+        configure_swagger(self.graph)
+
+        self.client = self.graph.flask.test_client()
+
+    def initiate(self):
+        response = self.client.post("/api/file/upload?filename=hello.txt")
+        assert_that(response.status_code, is_(equal_to(201)))
+        return loads(response.get_data().decode("utf-8"))["id"]
+
+    def append(self, upload_id, offset, data):
+        return self.client.patch(
+            "/api/file/upload/{}?offset={}".format(upload_id, offset),
+            data=data,
+            content_type="application/octet-stream",
+        )
+
+    def test_chunked_upload(self):
+        upload_id = self.initiate()
+
+        response = self.append(upload_id, 0, b"Hello ")
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), has_entries(offset=6))
+
+        response = self.append(upload_id, 6, b"World\n")
+        assert_that(loads(response.get_data().decode("utf-8")), has_entries(offset=12))
+
+        # nothing is processed until the upload is finalized
+        assert_that(self.calls, contains())
+
+        response = self.client.post("/api/file/upload/{}?extra=special".format(upload_id))
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), has_key("id"))
+        assert_that(self.calls, contains(
+            ("file", b"Hello World\n", "hello.txt", "special"),
+        ))
+
+        # the upload is removed once finalized
+        response = self.client.post("/api/file/upload/{}".format(upload_id))
+        assert_that(response.status_code, is_(equal_to(404)))
+
+    def test_chunk_offset_mismatch(self):
+        upload_id = self.initiate()
+        self.append(upload_id, 0, b"Hello ")
+
+        response = self.append(upload_id, 0, b"Hello ")
+        assert_that(response.status_code, is_(equal_to(409)))
+        assert_that(loads(response.get_data().decode("utf-8"))["context"], has_entries(offset=6))
+
+    def test_chunk_too_large(self):
+        upload_id = self.initiate()
+        self.append(upload_id, 0, b"Hello ")
+
+        response = self.append(upload_id, 6, b"World\n" * 2)
+        assert_that(response.status_code, is_(equal_to(413)))
+
+        # the failed chunk was discarded and may be retried
+        response = self.append(upload_id, 6, b"World\n")
+        assert_that(response.status_code, is_(equal_to(200)))
+
+    def test_concurrent_chunks(self):
+        storage = LocalChunkStorage(mkdtemp())
+        upload_id = storage.create("hello.txt")
+        reading, release = Event(), Event()
+
+        class SlowStream:
+            def __init__(self):
+                self.chunks = [b"Hello ", b"World\n"]
+
+            def read(self, size):
+                reading.set()
+                release.wait()
+                return self.chunks.pop(0) if self.chunks else b""
+
+        errors = []
+
+        def append(stream):
+            try:
+                storage.append(upload_id, 0, stream)
+            except Exception as error:
+                errors.append(error)
+
+        first = Thread(target=append, args=(SlowStream(),), daemon=True)
+        first.start()
+        reading.wait()
+        second = Thread(target=append, args=(BytesIO(b"Other\n"),), daemon=True)
+        second.start()
+
+        try:
+            # the second chunk waits for the first (rather than interleaving)
+            second.join(0.1)
+            assert_that(second.is_alive(), is_(equal_to(True)))
+        finally:
+            release.set()
+            first.join()
+            second.join()
+
+        assert_that(errors, contains(instance_of(Conflict)))
+        filepath, _ = storage.open(upload_id)
+        assert_that(open(filepath, "rb").read(), is_(equal_to(b"Hello World\n")))
+
+    def test_running_digest(self):
+        storage = LocalChunkStorage(mkdtemp(), hash_algorithm="sha256")
+        upload_id = storage.create("hello.txt")
+        storage.append(upload_id, 0, BytesIO(b"Hello "))
+        storage.append(upload_id, 6, BytesIO(b"World\n"))
+
+        with patch("microcosm_flask.conventions.upload.stream_digest") as mocked:
+            digest = storage.digest(upload_id, "sha256")
+
+        assert_that(digest, is_(equal_to(sha256(b"Hello World\n").hexdigest())))
+        assert_that(mocked.called, is_(equal_to(False)))
+
+        # other algorithms are computed by reading the upload
+        assert_that(storage.digest(upload_id, "md5"), is_(equal_to(md5(b"Hello World\n").hexdigest())))
+
+    def test_swagger(self):
+        response = self.client.get("/api/swagger")
+        assert_that(response.status_code, is_(equal_to(200)))
+        data = loads(response.data)
+
+        assert_that(data["paths"], has_key("/file/upload"))
+        assert_that(data["paths"]["/file/upload/{upload_id}"], all_of(
+            has_entry("patch", has_entry("consumes", contains("application/octet-stream"))),
+            has_entry("post", has_entry("operationId", "finalize_upload")),
+        ))
@@ -0,0 +1,111 @@
+"""
+Test Arrow formatting.
+
+"""
+from decimal import Decimal
+
+from hamcrest import (
+    assert_that,
+    equal_to,
+    is_,
+)
+from marshmallow import Schema, fields
+from microcosm.api import create_object_graph
+import pyarrow
+from pyarrow import ipc
+
+from microcosm_flask.formatting import ArrowFormatter
+
+
+class FooSchema(Schema):
+    name = fields.String()
+    count = fields.Integer()
+    score = fields.Float()
+    enabled = fields.Boolean()
+    tags = fields.List(fields.String())
+
+
+class FooListSchema(Schema):
+    items = fields.List(fields.Nested(FooSchema))
+
+
+def read_table(data):
+    return ipc.open_stream(data).read_all()
+
+
+def test_make_response():
+    graph = create_object_graph(name="example", testing=True)
+    formatter = ArrowFormatter(FooListSchema())
+
+    response_data = dict(
+        items=[
+            dict(name="foo", count=1, score=1.5, enabled=True, tags=["a"]),
+            dict(name="bar", count=2, score=None, enabled=False, tags=[]),
+        ],
+    )
+    with graph.app.test_request_context():
+        response = formatter(response_data)
+
+    assert_that(response.content_type, is_(equal_to("application/vnd.apache.arrow.stream")))
+
+    table = read_table(response.data)
+    assert_that(
+        {field.name: str(field.type) for field in table.schema},
+        is_(equal_to(dict(name="string", count="int64", score="double", enabled="bool", tags="string"))),
+    )
+    assert_that(table.to_pydict(), is_(equal_to(dict(
+        name=["foo", "bar"],
+        count=[1, 2],
+        score=[1.5, None],
+        enabled=[True, False],
+        tags=['["a"]', "[]"],
+    ))))
+
+
+def test_make_response_without_schema():
+    graph = create_object_graph(name="example", testing=True)
+    formatter = ArrowFormatter()
+
+    with graph.app.test_request_context():
+        response = formatter(dict(name="foo", count=1))
+
+    table = read_table(response.data)
+    assert_that(table.to_pydict(), is_(equal_to(dict(name=["foo"], count=['1']))))
+
+
+class NumericSchema(Schema):
+    amount = fields.Decimal()
+    price = fields.Decimal(places=2)
+    count = fields.Integer(as_string=True)
+    total = fields.Number(as_string=True)
+
+
+def test_make_response_numeric():
+    graph = create_object_graph(name="example", testing=True)
+    formatter = ArrowFormatter(NumericSchema())
+
+    response_data = NumericSchema().dump(dict(
+        amount=Decimal("1.5"),
+        price=Decimal("2.50"),
+        count=3,
+        total=4.5,
+    )).data
+    with graph.app.test_request_context():
+        response = formatter(response_data)
+
+    table = read_table(response.data)
+    assert_that(
+        {field.name: field.type for field in table.schema},
+        is_(equal_to(dict(
+            amount=pyarrow.float64(),
+            price=pyarrow.decimal128(38, 2),
+            count=pyarrow.string(),
+            total=pyarrow.string(),
+        ))),
+    )
+    assert_that(table.to_pydict(), is_(equal_to(dict(
+        amount=[1.5],
+        price=[Decimal("2.50")],
+        count=["3"],
+        total=["4.5"],
+    ))))
@@ -95,3 +95,62 @@ def test_make_response_ordered():
             spooky_hash='"0a7f40b47efb0a197b180444c4911b17"',
         )),
     ))
+
+
+def test_make_response_nested():
+    formatter = CSVFormatter()
+
+    response = formatter(dict(items=[
+        dict(foo="bar", baz=dict(qux=1, quux=dict(corge=2))),
+        dict(foo="bar", baz=dict(qux=3, quux=dict(corge=4))),
+    ]))
+
+    assert_that(response.data, is_(equal_to(b"foo,baz.qux,baz.quux.corge\r\nbar,1,2\r\nbar,3,4\r\n")))
+
+
+def test_make_response_empty():
+    formatter = CSVFormatter(PersonCSVSchema())
+
+    response = formatter(dict(items=[]))
+
+    assert_that(response.data, is_(equal_to(b"id,firstName,lastName\r\n")))
+
+
+def test_column_order_is_not_modified():
+    class Schema:
+        csv_column_order = ["lastName"]
+
+    schema = Schema()
+    formatter = CSVFormatter(schema)
+
+    for _ in range(2):
+        response = formatter(dict(items=[
+            dict(firstName="First", lastName="Last"),
+        ]))
+        assert_that(response.data, is_(equal_to(b"lastName,firstName\r\nLast,First\r\n")))
+
+    assert_that(schema.csv_column_order, is_(equal_to(["lastName"])))
+
+
+def test_make_response_nested_column_order():
+    class Schema:
+        csv_column_order = ["id", "address"]
+
+    formatter = CSVFormatter(Schema())
+
+    response = formatter(dict(items=[
+        dict(id="me", address=dict(city="Boston")),
+    ]))
+
+    assert_that(response.data, is_(equal_to(b"id,address\r\nme,{'city': 'Boston'}\r\n")))
+
+
+def test_make_response_nested_missing():
+    formatter = CSVFormatter()
+
+    response = formatter(dict(items=[
+        dict(id="me", address=dict(city="Boston")),
+        dict(id="you", address=None),
+    ]))
+
+    assert_that(response.data, is_(equal_to(b"id,address.city\r\nme,Boston\r\nyou,\r\n")))
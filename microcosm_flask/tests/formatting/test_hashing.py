@@ -0,0 +1,52 @@
+"""
+Test ETag hashing.
+
+"""
+from hamcrest import (
+    assert_that,
+    calling,
+    equal_to,
+    has_key,
+    is_,
+    is_not,
+    raises,
+)
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+
+from microcosm_flask.formatting import JSONFormatter
+from microcosm_flask.formatting.hashing import ETAG_HASHES, get_etag_hash
+
+
+def test_hashes_accept_memoryviews():
+    data = b"0123456789" * 100
+    for name, hash_func in ETAG_HASHES.items():
+        assert_that(hash_func(memoryview(data)), is_(equal_to(hash_func(data))))
+
+
+def test_unknown_hash():
+    assert_that(calling(get_etag_hash).with_args("foo"), raises(ValueError))
+
+
+def test_configure_hash():
+    loader = load_from_dict(flask=dict(etag_hash="blake2"))
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    formatter = JSONFormatter()
+
+    with graph.app.test_request_context():
+        response = formatter(dict(foo="bar"))
+
+    assert_that(response.headers["ETag"], is_(equal_to('"a96f14f6878d1c8559f21da61bcb0d0b"')))
+
+
+def test_etag_max_size():
+    loader = load_from_dict(flask=dict(etag_max_size=8))
+    graph = create_object_graph(name="example", testing=True, loader=loader)
+    formatter = JSONFormatter()
+
+    with graph.app.test_request_context():
+        small_response = formatter("foo")
+        large_response = formatter(dict(foo="bar"))
+
+    assert_that(small_response.headers, has_key("ETag"))
+    assert_that(large_response.headers, is_not(has_key("ETag")))
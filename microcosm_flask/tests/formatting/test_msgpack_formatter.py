@@ -0,0 +1,26 @@
+"""
+Test MessagePack formatting.
+
+"""
+from hamcrest import (
+    assert_that,
+    equal_to,
+    is_,
+)
+from msgpack import unpackb
+
+from microcosm.api import create_object_graph
+
+from microcosm_flask.formatting import MessagePackFormatter
+
+
+def test_make_response():
+    graph = create_object_graph(name="example", testing=True)
+    formatter = MessagePackFormatter()
+
+    with graph.app.test_request_context():
+        response = formatter(dict(foo="bar", items=[1, 2]))
+
+    assert_that(unpackb(response.data, raw=False), is_(equal_to(dict(foo="bar", items=[1, 2]))))
+    assert_that(response.content_type, is_(equal_to("application/x-msgpack")))
+    assert_that(response.headers["ETag"], is_(equal_to(response.get_etag()[0].join('""'))))
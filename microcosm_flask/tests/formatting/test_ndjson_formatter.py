@@ -0,0 +1,28 @@
+"""
+Test newline-delimited json formatting.
+
+"""
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_key,
+    is_,
+    is_not,
+)
+
+from microcosm.api import create_object_graph
+
+from microcosm_flask.formatting import NDJSONFormatter
+
+
+def test_make_response():
+    graph = create_object_graph(name="example", testing=True)
+    formatter = NDJSONFormatter()
+
+    with graph.app.test_request_context():
+        response = formatter(iter([dict(foo="bar"), dict(foo="baz")]))
+        assert_that(response.is_streamed, is_(equal_to(True)))
+        assert_that(response.data, is_(equal_to(b'{"foo": "bar"}\n{"foo": "baz"}\n')))
+
+    assert_that(response.content_type, is_(equal_to("application/x-ndjson")))
+    assert_that(response.headers, is_not(has_key("ETag")))
@@ -0,0 +1,75 @@
+"""
+Test offline swagger generation.
+
+"""
+from json import load, loads
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from hamcrest import (
+    assert_that,
+    contains,
+    equal_to,
+    has_key,
+    is_,
+)
+from microcosm.api import create_object_graph
+from microcosm.loaders import load_from_dict
+
+from microcosm_flask.conventions.crud import configure_crud
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+from microcosm_flask.swagger.cli import generate_swagger
+from microcosm_flask.tests.conventions.fixtures import (
+    NewPersonSchema,
+    Person,
+    PersonSchema,
+    person_create,
+)
+
+
+class TestGenerateSwagger:
+
+    def setup(self):
+        self.output_dir = mkdtemp()
+
+    def teardown(self):
+        rmtree(self.output_dir)
+
+    def create_graph(self, **config):
+        loader = load_from_dict(swagger_convention=dict(version="v1", **config))
+        return create_object_graph(name="example", testing=True, loader=loader)
+
+    def test_generate_swagger(self):
+        graph = self.create_graph()
+        configure_crud(graph, Namespace(subject=Person, version="v1"), {
+            Operation.Create: (person_create, NewPersonSchema(), PersonSchema()),
+        })
+        graph.use("swagger_convention")
+
+        paths = generate_swagger(graph, self.output_dir)
+
+        assert_that(paths, contains(join(self.output_dir, "swagger-v1.json")))
+        with open(paths[0]) as infile:
+            swagger = load(infile)
+        assert_that(swagger["paths"], has_key("/person"))
+
+        client = graph.flask.test_client()
+        response = client.get("/api/v1/swagger")
+        assert_that(loads(response.get_data().decode("utf-8")), is_(equal_to(swagger)))
+
+    def test_serve_artifact(self):
+        with open(join(self.output_dir, "swagger-v1.json"), "w") as outfile:
+            outfile.write('{"swagger": "2.0", "paths": {}}')
+
+        graph = self.create_graph(artifact_dir=self.output_dir)
+        graph.use("swagger_convention")
+
+        client = graph.flask.test_client()
+        response = client.get("/api/v1/swagger")
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(loads(response.get_data().decode("utf-8")), is_(equal_to({
+            "swagger": "2.0",
+            "paths": {},
+        })))
@@ -2,6 +2,8 @@
 Test Swagger definition construction.
 
 """
+from unittest.mock import patch
+
 from hamcrest import (
     assert_that,
     equal_to,
@@ -235,3 +237,22 @@ def test_build_swagger():
             "application/json",
         ],
     })))
+
+
+def test_build_swagger_without_validation():
+    graph = create_object_graph(name="example", testing=True)
+    ns = Namespace(
+        subject=Person,
+        version="v1",
+    )
+    configure_crud(graph, ns, PERSON_MAPPINGS)
+
+    def match_function(operation, obj, rule):
+        return True
+
+    with graph.flask.test_request_context():
+        operations = list(iter_endpoints(graph, match_function))
+        with patch("openapi.model.Swagger.validate") as mocked:
+            build_swagger(graph, ns, operations, validate=False)
+
+    assert_that(mocked.called, is_(equal_to(False)))
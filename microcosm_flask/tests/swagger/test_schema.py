@@ -4,8 +4,10 @@ Test JSON Schema generation.
 """
 from hamcrest import (
     assert_that,
+    contains,
     equal_to,
     is_,
+    same_instance,
 )
 
 from enum import Enum, IntEnum, unique
@@ -15,9 +17,12 @@ from microcosm_flask.fields import (
     EnumField,
     TimestampField,
 )
+from microcosm_flask.conventions.logging_level import LoggerSchema
 from microcosm_flask.swagger.schema import (
+    build_keyed_schema,
     build_schema,
     build_parameter,
+    iter_schemas,
     swagger_field,
 )
 from microcosm_flask.tests.conventions.fixtures import NewPersonSchema
@@ -187,3 +192,42 @@ def test_field_one_of():
     parameter = build_parameter(TestSchema().fields["mixed"])
     assert_that(parameter, is_(equal_to({
     })))
+
+
+def test_schema_generation_is_memoized():
+    assert_that(build_schema(NewPersonSchema()), is_(same_instance(build_schema(NewPersonSchema()))))
+    assert_that(
+        build_schema(NewPersonSchema(only=("firstName",)))["properties"],
+        is_(equal_to({
+            "firstName": {
+                "type": "string",
+            },
+        })),
+    )
+
+
+def test_iter_schemas_self_referencing():
+    assert_that(
+        [name for name, schema in iter_schemas(LoggerSchema())],
+        contains("Logger"),
+    )
+
+
+def test_iter_schemas_shared():
+    seen = set()
+    assert_that(
+        [name for name, schema in iter_schemas(TestSchema(), seen)],
+        contains("Test", "NewPerson"),
+    )
+    assert_that(
+        [name for name, schema in iter_schemas(NewPersonSchema(), seen)],
+        contains(),
+    )
+
+
+def test_schema_generation_cache_is_bounded():
+    for index in range(build_keyed_schema.cache_info().maxsize + 1):
+        build_schema(NewPersonSchema(exclude=("field{}".format(index),)))
+
+    cache_info = build_keyed_schema.cache_info()
+    assert_that(cache_info.currsize, is_(equal_to(cache_info.maxsize)))
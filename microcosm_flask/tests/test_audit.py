@@ -20,6 +20,8 @@ from werkzeug.exceptions import NotFound
 from microcosm_flask.audit import (
     AuditOptions,
     RequestInfo,
+    StackTracePolicy,
+    StackTraces,
     logging_levels,
     should_skip_logging,
 )
@@ -141,6 +143,38 @@ class TestRequestInfo:
                 ))),
             )
 
+    def capture_not_found(self, options):
+        with self.graph.flask.test_request_context("/"):
+            request_info = RequestInfo(options, test_func, None)
+            try:
+                raise NotFound("Not Found")
+            except Exception as error:
+                request_info.capture_error(error)
+            return request_info.to_dict()
+
+    def test_error_server_errors_policy(self):
+        """
+        Client errors do not capture stack traces if only server errors should.
+
+        """
+        options = self.options._replace(stack_traces=StackTraces(StackTracePolicy.SERVER_ERRORS))
+        dct = self.capture_not_found(options)
+        assert_that(dct["stack_trace"], is_(none()))
+
+    def test_error_fingerprint_policy(self):
+        """
+        Repeated errors log their fingerprint and a count instead of a stack trace.
+
+        """
+        options = self.options._replace(stack_traces=StackTraces(StackTracePolicy.FINGERPRINT))
+        first, second = [self.capture_not_found(options) for _ in range(2)]
+
+        assert_that(first["stack_trace"], is_not(none()))
+        assert_that(first["stack_trace_count"], is_(equal_to(1)))
+        assert_that(second["stack_trace"], is_(none()))
+        assert_that(second["stack_trace_count"], is_(equal_to(2)))
+        assert_that(second["stack_trace_fingerprint"], is_(equal_to(first["stack_trace_fingerprint"])))
+
     def test_request_body(self):
         """
         Can capture the request body.
@@ -22,3 +22,33 @@ def test_request_context():
     }):
         with graph.opaque.initialize(graph.request_context):
             assert_that(graph.opaque["X-Request-Id"], is_(equal_to("foo")))
+
+
+def test_request_context_memoized():
+    graph = create_object_graph(name="example", testing=True)
+    graph.use("request_context")
+
+    with graph.flask.test_request_context(headers={
+            "X-Request-Id": "foo",
+            "x-request-user": "bar",
+            "X-Other": "baz",
+    }):
+        context = graph.request_context()
+        assert_that(context, is_(equal_to({
+            "X-Request-Id": "foo",
+            "X-Request-User": "bar",
+        })))
+
+        # callers receive a copy of the memoized context
+        context["X-Request-Id"] = "bar"
+        assert_that(graph.request_context(), is_(equal_to({
+            "X-Request-Id": "foo",
+            "X-Request-User": "bar",
+        })))
+
+    with graph.flask.test_request_context(headers={
+            "X-Request-Id": "qux",
+    }):
+        assert_that(graph.request_context(), is_(equal_to({
+            "X-Request-Id": "qux",
+        })))
@@ -6,11 +6,14 @@ from json import loads
 
 from hamcrest import (
     assert_that,
+    contains,
     equal_to,
     has_entry,
+    has_key,
     is_,
+    is_not,
 )
-from werkzeug.exceptions import InternalServerError, NotFound, HTTPException
+from werkzeug.exceptions import BadRequest, InternalServerError, NotFound, HTTPException
 
 from microcosm.api import create_object_graph
 
@@ -40,6 +43,11 @@ class NonNumericError(Exception):
     code = "foo"
 
 
+class NullContextError(Exception):
+    code = 422
+    context = None
+
+
 class AuthenticationError(HTTPException):
     code = 401
     description = "no trespassing"
@@ -278,3 +286,59 @@ def test_custom_headers():
                 has_entry("message", AuthenticationError.description))
     www_authenticate = response.headers.get('www-authenticate')
     assert_that(www_authenticate, equal_to('Basic realm=outer-zone'))
+
+
+def test_error_response_headers():
+    """
+    Error responses are JSON and are not tagged.
+
+    """
+    graph = create_object_graph(name="example", testing=True)
+
+    @graph.app.route("/conflict")
+    @graph.audit
+    def conflict():
+        raise MyConflictError()
+
+    client = graph.app.test_client()
+
+    for uri in ("/no_route", "/conflict"):
+        response = client.get(uri)
+        assert_that(response.headers.getlist("Content-Type"), contains("application/json"))
+        assert_that(response.headers, is_not(has_key("ETag")))
+
+
+def test_unhashable_error_description():
+    """
+    Errors with unhashable descriptions are still encoded.
+
+    """
+    graph = create_object_graph(name="example", testing=True)
+
+    @graph.app.route("/bad_request")
+    def bad_request():
+        raise BadRequest(description=dict(foo=["bar"]))
+
+    client = graph.app.test_client()
+
+    response = client.get("/bad_request")
+    assert_that(response.status_code, is_(equal_to(400)))
+    assert_that(loads(response.get_data().decode("utf-8")), has_entry("message", dict(foo=["bar"])))
+
+
+def test_null_error_context():
+    """
+    Errors with an explicit (null) context are encoded with that context.
+
+    """
+    graph = create_object_graph(name="example", testing=True)
+
+    @graph.app.route("/null_context")
+    def null_context():
+        raise NullContextError("null")
+
+    client = graph.app.test_client()
+
+    response = client.get("/null_context")
+    assert_that(response.status_code, is_(equal_to(422)))
+    assert_that(loads(response.get_data().decode("utf-8")), has_entry("context", None))
@@ -4,12 +4,16 @@ Namespace tests.
 """
 from hamcrest import (
     assert_that,
+    calling,
     equal_to,
     is_,
     none,
+    raises,
 )
 from unittest.mock import Mock
 
+from werkzeug.exceptions import InternalServerError
+
 from microcosm.api import create_object_graph
 from microcosm_flask.matchers import matches_uri
 from microcosm_flask.namespaces import Namespace
@@ -70,6 +74,27 @@ def test_parse_endpoint_swagger():
     assert_that(ns.object_, is_(none()))
 
 
+def test_parse_endpoint_identifier_type():
+    """
+    Parsed endpoints are independent of each other.
+
+    """
+    _, ns = Namespace.parse_endpoint("foo.retrieve.v1", "string")
+    _, other_ns = Namespace.parse_endpoint("foo.retrieve.v1")
+    assert_that(ns.instance_path, is_(equal_to("v1/foo/<string:foo_id>")))
+    assert_that(other_ns.instance_path, is_(equal_to("v1/foo/<uuid:foo_id>")))
+
+
+def test_parse_endpoint_malformed():
+    """
+    Endpoints that do not follow the operation's pattern are rejected.
+
+    """
+    assert_that(calling(Namespace.parse_endpoint).with_args("foo.search_for.bar"), raises(InternalServerError))
+    assert_that(calling(Namespace.parse_endpoint).with_args("static"), raises(IndexError))
+    assert_that(calling(Namespace.parse_endpoint).with_args("foo.bar.v1"), raises(ValueError))
+
+
 def test_operation_url_for():
     """
     Operations can resolve themselves via Flask's `url_for`.
@@ -179,3 +204,33 @@ def test_qualified_operation_href_for():
     with graph.app.test_request_context():
         url = ns.href_for(Operation.Retrieve, foo_id="baz")
         assert_that(url, is_(equal_to("http://localhost/api/v1/bar/foo/baz")))
+
+
+def test_derived_values_are_memoized():
+    """
+    Derived paths and endpoints are computed once per namespace.
+
+    """
+    ns = Namespace(subject="foo", object_="bar", version="v2")
+
+    assert_that(ns.relation_path, is_(equal_to("v2/foo/<uuid:foo_id>/bar")))
+    assert_that(ns.endpoint_for(Operation.SearchFor), is_(equal_to("foo.search_for.bar.v2")))
+    assert_that(ns.relation_path, is_(ns.relation_path))
+    assert_that(ns.endpoint_for(Operation.SearchFor), is_(ns.endpoint_for(Operation.SearchFor)))
+
+
+def test_memoized_values_are_invalidated():
+    """
+    Changing a namespace attribute discards memoized values.
+
+    """
+    ns = Namespace(subject="foo")
+
+    assert_that(ns.instance_path, is_(equal_to("/foo/<uuid:foo_id>")))
+    assert_that(ns.endpoint_for(Operation.Retrieve), is_(equal_to("foo.retrieve.v1")))
+
+    ns.identifier_type = "string"
+    ns.version = "v2"
+
+    assert_that(ns.instance_path, is_(equal_to("v2/foo/<string:foo_id>")))
+    assert_that(ns.endpoint_for(Operation.Retrieve), is_(equal_to("foo.retrieve.v2")))
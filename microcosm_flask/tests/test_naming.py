@@ -53,3 +53,19 @@ def test_instance_path():
 def test_relation_path():
     assert_that(relation_path_for("foo", "bar", "uuid"), is_(equal_to("/foo/<uuid:foo_id>/bar")))
     assert_that(relation_path_for("foo", "bar", "baz"), is_(equal_to("/foo/<baz:foo_id>/bar")))
+
+
+def test_name_for_subclass():
+    """
+    Names are memoized per class and do not leak across classes.
+
+    """
+    class FooBaz():
+        pass
+
+    class FooQux(FooBaz):
+        __alias__ = "qux"
+
+    assert_that(name_for(FooBaz), is_(equal_to("foo_baz")))
+    assert_that(name_for(FooQux()), is_(equal_to("qux")))
+    assert_that(name_for(FooBaz()), is_(equal_to("foo_baz")))
@@ -4,8 +4,10 @@ Operation tests.
 """
 from hamcrest import (
     assert_that,
+    calling,
     equal_to,
     is_,
+    raises,
 )
 
 from microcosm_flask.operations import Operation
@@ -37,3 +39,22 @@ def test_endpoint_pattern():
         Operation.SearchFor.endpoint_pattern,
         is_(equal_to("(?P<subject>[^.]*)[.](?P<operation>[^.]*)[.](?P<object_>[^.]*)[.](?P<version>[^.]*)")),
     )
+
+
+def test_from_name_unknown():
+    """
+    Unknown operation names are rejected.
+
+    """
+    assert_that(calling(Operation.from_name).with_args("foo"), raises(ValueError))
+
+
+def test_endpoint_regex():
+    """
+    Operations define precompiled endpoint patterns.
+
+    """
+    assert_that(
+        Operation.SearchFor.endpoint_regex.match("foo.search_for.bar.v1").groupdict(),
+        is_(equal_to(dict(subject="foo", operation="search_for", object_="bar", version="v1"))),
+    )
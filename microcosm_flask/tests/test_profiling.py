@@ -0,0 +1,25 @@
+"""
+Startup profiling tests.
+
+"""
+from hamcrest import (
+    assert_that,
+    greater_than,
+    has_items,
+    is_,
+    none,
+)
+
+from microcosm_flask.profiling import profile_startup
+
+
+def test_profile_startup():
+    graph_time, profiles = profile_startup(name="example", testing=True)
+
+    assert_that(graph_time, is_(greater_than(0)))
+    assert_that(
+        [profile.name for profile in profiles],
+        has_items("app", "flask", "health_convention", "swagger_convention"),
+    )
+    for profile in profiles:
+        assert_that(profile.error, is_(none()))
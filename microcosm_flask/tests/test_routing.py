@@ -0,0 +1,152 @@
+"""
+Route decorator tests.
+
+"""
+from functools import wraps
+from unittest import SkipTest
+from unittest.mock import ANY, call
+
+from hamcrest import (
+    assert_that,
+    contains,
+    equal_to,
+    has_entries,
+    has_key,
+    instance_of,
+    is_,
+    is_not,
+)
+from microcosm.api import create_object_graph
+from microcosm_logging.decorators import ContextLogger
+from werkzeug.exceptions import NotFound
+
+from microcosm_flask.namespaces import Namespace
+from microcosm_flask.operations import Operation
+
+
+class Controller:
+    pass
+
+
+class TestRoute:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.controller = Controller()
+        self.ns = Namespace(subject="foo", controller=self.controller)
+        self.loggers = []
+
+        @self.graph.route(self.ns.collection_path, Operation.Search, self.ns)
+        def search_foo():
+            self.loggers.append(self.controller.logger)
+            return ""
+
+        self.client = self.graph.flask.test_client()
+
+    def test_context_logger(self):
+        response = self.client.get("/api/foo", headers={"X-Request-Id": "bar"})
+        assert_that(response.status_code, is_(equal_to(200)))
+
+        logger, = self.loggers
+        assert_that(logger, is_(instance_of(ContextLogger)))
+        assert_that(dict(logger.extra), has_entries({"X-Request-Id": "bar"}))
+        # the context logger is removed after the request
+        assert_that(self.controller.logger, is_not(instance_of(ContextLogger)))
+
+    def test_cors(self):
+        response = self.client.get("/api/foo", headers={"Origin": "http://example.com"})
+        assert_that(response.headers, has_key("Access-Control-Allow-Origin"))
+
+    def test_cors_options(self):
+        response = self.client.options("/api/foo", headers={
+            "Origin": "http://example.com",
+            "Access-Control-Request-Method": "GET",
+        })
+        assert_that(response.status_code, is_(equal_to(200)))
+        assert_that(response.headers, has_key("Access-Control-Allow-Origin"))
+        assert_that(self.loggers, is_(equal_to([])))
+
+
+class TestRouteMetrics:
+
+    def setup(self):
+        try:
+            import microcosm_metrics  # noqa
+        except ImportError:
+            raise SkipTest
+
+        self.graph = create_object_graph(name="example", testing=True)
+        self.graph.use("datadog_statsd")
+        self.graph.metrics.reset_mock()
+        self.ns = Namespace(subject="foo", enable_metrics=True)
+        self.client = self.graph.flask.test_client()
+
+    def expected_calls(self, func):
+        """
+        Compute the metrics emitted by the metrics decorators for a function.
+
+        """
+        from microcosm_flask.metrics import StatusCodeClassifier
+
+        tags = ["endpoint:foo.search.v1", "backend_type:microcosm_flask"]
+        func = self.graph.metrics_counting("route", tags=tags, classifier_cls=StatusCodeClassifier)(func)
+        func = self.graph.metrics_timing("route", tags=tags)(func)
+        try:
+            func()
+        except Exception:
+            pass
+
+        calls = [
+            call.histogram(args[0], ANY, **kwargs) if name == "histogram" else getattr(call, name)(*args, **kwargs)
+            for name, args, kwargs in self.graph.metrics.mock_calls
+        ]
+        self.graph.metrics.reset_mock()
+        return calls
+
+    def check_metrics(self, func, status_code):
+        expected_calls = self.expected_calls(func)
+        self.graph.route(self.ns.collection_path, Operation.Search, self.ns)(func)
+
+        response = self.client.get("/api/foo")
+
+        assert_that(response.status_code, is_(equal_to(status_code)))
+        assert_that(self.graph.metrics.mock_calls, contains(*expected_calls))
+
+    def test_success_metrics(self):
+        def search_foo():
+            return ""
+
+        self.check_metrics(search_foo, 200)
+
+    def test_error_metrics(self):
+        def search_foo():
+            raise NotFound
+
+        self.check_metrics(search_foo, 404)
+
+
+def test_custom_audit():
+    """
+    Routes are audited by custom audit decorators that do not expose their options.
+
+    """
+    audited = []
+
+    def audit(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            audited.append(func.__name__)
+            return func(*args, **kwargs)
+        return wrapper
+
+    graph = create_object_graph(name="example", testing=True)
+    graph.assign("audit", audit)
+    ns = Namespace(subject="foo")
+
+    @graph.route(ns.collection_path, Operation.Search, ns)
+    def search_foo():
+        return ""
+
+    response = graph.flask.test_client().get("/api/foo")
+    assert_that(response.status_code, is_(equal_to(200)))
+    assert_that(audited, contains("search_foo"))
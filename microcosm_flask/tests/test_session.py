@@ -0,0 +1,172 @@
+"""
+Per-request session tests.
+
+"""
+from unittest import SkipTest
+
+from flask import g
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_entries,
+    is_,
+)
+from microcosm.api import create_object_graph
+
+from microcosm_flask.session import register_pooled_session_factory
+
+
+class Session:
+
+    def __init__(self):
+        self.valid = True
+        self.resets = 0
+        self.closed = False
+        self.entered = False
+
+    def __enter__(self):
+        self.entered = True
+        return self
+
+    def __exit__(self, *args):
+        self.entered = False
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestPooledSession:
+
+    def setup(self):
+        self.graph = create_object_graph(name="example", testing=True)
+        self.sessions = []
+
+        def session_factory(graph):
+            session = Session()
+            self.sessions.append(session)
+            return session
+
+        self.session_factory = session_factory
+
+        self.pool = register_pooled_session_factory(
+            self.graph,
+            "session",
+            session_factory,
+            reset_func=Session.reset,
+            max_size=1,
+            validate_func=lambda session: session.valid,
+        )
+        self.lazy_pool = register_pooled_session_factory(
+            self.graph,
+            "lazy_session",
+            session_factory,
+            reset_func=Session.reset,
+            lazy=True,
+        )
+
+        @self.graph.flask.route("/session")
+        def use_session():
+            return str(id(g.session))
+
+        @self.graph.flask.route("/error")
+        def use_session_with_error():
+            g.session
+            raise Exception("error")
+
+        @self.graph.flask.route("/lazy")
+        def use_lazy_session():
+            return str(g.lazy_session.resets)
+
+        @self.graph.flask.route("/lazy/with")
+        def use_lazy_session_context():
+            with g.lazy_session as session:
+                return str(session.entered)
+
+        self.client = self.graph.flask.test_client()
+
+    def test_reuse(self):
+        first = self.client.get("/session").data
+        second = self.client.get("/session").data
+
+        assert_that(first, is_(equal_to(second)))
+        assert_that(self.sessions[0].resets, is_(equal_to(2)))
+        assert_that(self.pool.stats(), has_entries(
+            created=1,
+            reused=1,
+            checked_out=0,
+            idle=1,
+        ))
+
+    def test_validate(self):
+        self.client.get("/session")
+        self.sessions[0].valid = False
+        self.client.get("/session")
+
+        assert_that(self.sessions[0].closed, is_(equal_to(True)))
+        assert_that(self.pool.stats(), has_entries(
+            created=2,
+            discarded=1,
+        ))
+
+    def test_lazy(self):
+        # a request that does not use the lazy session does not check one out
+        self.client.get("/session")
+        assert_that(self.lazy_pool.stats(), has_entries(created=0))
+
+        response = self.client.get("/lazy")
+        assert_that(response.data, is_(equal_to(b"0")))
+        assert_that(self.lazy_pool.stats(), has_entries(
+            created=1,
+            checked_out=0,
+            idle=1,
+        ))
+
+    def test_lazy_context_manager(self):
+        response = self.client.get("/lazy/with")
+        assert_that(response.data, is_(equal_to(b"True")))
+        assert_that(self.lazy_pool.stats(), has_entries(created=1))
+
+    def test_error(self):
+        # sessions used by failed requests are not reused (even if the error was handled)
+        self.graph.use("error_handlers")
+        response = self.client.get("/error")
+        assert_that(response.status_code, is_(equal_to(500)))
+        self.client.get("/session")
+
+        assert_that(self.sessions[0].closed, is_(equal_to(True)))
+        assert_that(self.sessions[0].resets, is_(equal_to(0)))
+        assert_that(self.pool.stats(), has_entries(
+            created=2,
+            discarded=1,
+        ))
+
+    def test_metrics(self):
+        try:
+            import microcosm_metrics  # noqa
+        except ImportError:
+            raise SkipTest
+
+        self.graph.use("datadog_statsd")
+        register_pooled_session_factory(
+            self.graph,
+            "metered_session",
+            self.session_factory,
+            reset_func=Session.reset,
+            enable_metrics=True,
+        )
+
+        self.client.get("/session")
+
+        self.graph.metrics.gauge.assert_any_call(
+            "session_pool.created",
+            1,
+            tags=["session:metered_session"],
+        )
+        self.graph.metrics.gauge.assert_any_call(
+            "session_pool.checked_out",
+            0,
+            tags=["session:metered_session"],
+        )
@@ -32,8 +32,11 @@ setup(
         "rfc3986>=1.1.0",
     ],
     extras_require={
+        "arrow": "pyarrow>=0.11.0",
         "metrics": "microcosm-metrics>=1.0.0",
+        "msgpack": "msgpack>=0.5.6",
         "spooky": "spooky>=2.0.0",
+        "xxhash": "xxhash>=1.0.0",
     },
     setup_requires=[
         "nose>=1.3.6",